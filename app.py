@@ -1,28 +1,9 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.io as pio
-import ast
 
-# Configure plotly theme for dark mode
-template = pio.templates["plotly_dark"]
-template.layout.update(
-    paper_bgcolor="rgba(26, 32, 44, 0.0)",
-    plot_bgcolor="rgba(26, 32, 44, 0.0)",
-    font_color="#e2e8f0"
-)
-pio.templates.default = template
-
-# Update plotly express defaults
-px.defaults.template = "plotly_dark"
-px.defaults.color_continuous_scale = "blues"
-
-# Import section modules
-from trend_forecast import show_trend_forecast
-from trending_creators import show_trending_creators
-from trending_songs import show_trending_songs
-from trending_keywords import show_trending_keywords
-from trending_hashtags import show_trending_hashtags
+# Heavy libraries (plotly, wordcloud, gensim, spacy, ...) are imported by the
+# section that needs them; the plotly theme is applied on first chart render.
+# Section modules are imported on demand by the navigation registry
+from navigation import SECTIONS, next_section, prefetch_failures, prefetch_section, show_section
 
 # Configure page and theme
 st.set_page_config(
@@ -35,14 +16,14 @@ st.set_page_config(
 with open('styles.css') as f:
     st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
 
-# Custom CSS for tabs
+# Custom CSS for the section bar (styled like tabs)
 st.markdown('''
     <style>
-    .stTabs [data-baseweb="tab-list"] {
+    .st-key-section [role="radiogroup"] {
         gap: 24px;
         padding: 0px 24px;
     }
-    .stTabs [data-baseweb="tab"] {
+    .st-key-section [role="radiogroup"] label {
         height: 50px;
         background-color: transparent;
         border: none;
@@ -51,8 +32,10 @@ st.markdown('''
         font-weight: 600;
         padding: 0px 5px;
     }
-    .stTabs [aria-selected="true"] {
-        background-color: transparent;
+    .st-key-section [role="radiogroup"] label > div:first-child {
+        display: none;
+    }
+    .st-key-section [role="radiogroup"] label:has(input:checked) {
         border-radius: 0px;
         border-bottom: 3px solid #7f7fd5;
         color: #ffffff;
@@ -66,36 +49,65 @@ st.markdown(
 )
 st.subheader("An interactive dashboard for digital creators")
 
-# Create tabs for navigation
-tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
-    "Trend Forecast",
-    "Trending Creators",
-    "Trending Songs",
-    "Trending Keywords",
-    "Trending Hashtags",
-    "Trending Challenges",
-    "Industry Analysis",
-    "Emerging Topics"
-])
+# Country / snapshot date scope, once snapshots have been archived as partitions
+from partition_store import GLOBAL_COUNTRY, load_partitioned, partition_index, use_scope
+partitions = partition_index()
+scope = {}
+if not partitions.empty:
+    date_col, country_col, industry_col = st.columns(3)
+    snapshot_date = date_col.selectbox('Snapshot date', sorted(partitions['snapshot_date'].unique(), reverse=True))
+    country_options = sorted(set(partitions['country']) - {GLOBAL_COUNTRY})
+    countries = country_col.multiselect('Countries', country_options, placeholder='All countries')
+    scope = {'countries': countries or None, 'dates': [snapshot_date]}
+    if 'trending_hashtags' in set(partitions['table']):
+        industry_options = load_partitioned('trending_hashtags', tuple(countries) or None, (snapshot_date,),
+                                            columns=['industry_name'])['industry_name'].dropna()
+        industries = industry_col.multiselect('Industries', sorted(set(industry_options) - {''}), placeholder='All industries')
+        scope['industries'] = industries or None
+
+# Opt-in profiling of the selected section (TIKTOK_PROFILE sets the defaults)
+import profiling
+diagnostics = st.sidebar.expander('Diagnostics')
+profile_section = diagnostics.toggle('Profile section', value=bool(profiling.PROFILE_MODES), key='profile_section')
+profile_memory = diagnostics.checkbox('Track memory', value='memory' in profiling.PROFILE_MODES, key='profile_memory',
+                                      disabled=not profile_section)
+profile_sample = diagnostics.checkbox('Sampling profiler', value='sample' in profiling.PROFILE_MODES, key='profile_sample',
+                                      disabled=not profile_section)
+
+# Section bar for navigation: only the selected section loads and computes
+section = st.radio(
+    'Section',
+    list(SECTIONS),
+    horizontal=True,
+    key='section',
+    label_visibility='collapsed'
+)
+
+with use_scope(**scope):
+    # Content for the selected section
+    if profile_section:
+        with profiling.profile_run(section, profile_memory, profile_sample) as run_profile:
+            show_section(section)
+        profiling.show_profile(diagnostics, run_profile, run_profile.save_trace())
+    else:
+        show_section(section)
+
+    # Warm the next section's data in the background
+    prefetch_section(next_section(section))
+    for label, error in prefetch_failures().items():
+        diagnostics.warning(f'Prefetch of {label} failed: {error}')
 
-# Content for each tab
-with tab1:
-    show_trend_forecast()
-with tab2:
-    show_trending_creators()
-with tab3:
-    show_trending_songs()
-with tab4:
-    show_trending_keywords()
-with tab5:
-    show_trending_hashtags()
-with tab6:
-    from trending_challenges import show_trending_challenges
-    show_trending_challenges()
-with tab7:
-    from industry_analytics import show_industry_analytics
-    show_industry_analytics()
-with tab8:
-    from topic_modeling import show_topic_modeling
-    show_topic_modeling()
 
+# Data cache counters (shared across reruns and sessions)
+from data_cache import cache
+with st.sidebar.expander('Data Cache'):
+    cache_stats = cache.stats()
+    hits_col, misses_col = st.columns(2)
+    hits_col.metric('Hits', cache_stats['hits'])
+    misses_col.metric('Misses', cache_stats['misses'])
+    st.caption(
+        f"{cache_stats['entries']} entries · {cache_stats['memory_mb']} / {cache_stats['budget_mb']} MB · "
+        f"{cache_stats['evictions']} evictions"
+    )
+    if st.button('Clear cache'):
+        cache.clear()
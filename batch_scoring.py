@@ -0,0 +1,189 @@
+import argparse
+import os
+import pickle
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import pandas as pd
+from data_cache import cached
+from snapshot_store import SNAPSHOT_DIR, csv_path
+from video_facts import load_videos, source_paths, table_columns, with_video_columns
+
+# Batch Scoring
+#
+# Streams candidate videos (enhanced_trend_predictions.csv schema) in fixed-size
+# chunks through scaler -> selector -> model_24h / model_7d with vectorized
+# predict_proba. Chunks are scored in parallel worker processes that each load
+# the artifacts once; only a running top-K per horizon is kept in the parent, so
+# memory stays bounded by chunk size x in-flight chunks regardless of input size.
+# The stored top-K hold only id and trend_probability; captions, authors and
+# other display columns are joined from the video fact table when loaded.
+#
+#   python batch_scoring.py [source.csv|source.parquet] [--top-k 10] [--chunk-size 50000] [--workers 4]
+
+SCALER_PATH = os.path.join(SNAPSHOT_DIR, 'scaler.pkl')
+SELECTOR_PATH = os.path.join(SNAPSHOT_DIR, 'selector.pkl')
+HORIZON_MODELS = {
+    '24h': os.path.join(SNAPSHOT_DIR, 'model_24h.pkl'),
+    '7d': os.path.join(SNAPSHOT_DIR, 'model_7d.pkl'),
+}
+SCORES_DIR = os.path.join(SNAPSHOT_DIR, 'scores')
+# Precomputed notebook output used until a batch run has written scores
+FALLBACK_TABLES = {
+    '24h': 'predicted_viral_videos_next_24h',
+    '7d': 'predicted_viral_videos_next_7d',
+}
+# Columns carried into the output next to the probability
+OUTPUT_COLUMNS = ['id']
+
+
+def _unpickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def load_scoring_chain(horizons=tuple(HORIZON_MODELS), n_jobs=None):
+    """Load the scaler, selector and per-horizon models"""
+    models = {}
+    for horizon in horizons:
+        model = _unpickle(HORIZON_MODELS[horizon])
+        if n_jobs is not None:
+            model.n_jobs = n_jobs
+        models[horizon] = model
+    return {
+        'scaler': _unpickle(SCALER_PATH),
+        'selector': _unpickle(SELECTOR_PATH),
+        'models': models,
+    }
+
+
+def feature_columns(chain):
+    return list(chain['scaler'].feature_names_in_)
+
+
+def model_feature_columns():
+    """Feature columns the models were trained on, read from the scaler alone"""
+    return feature_columns({'scaler': _unpickle(SCALER_PATH)})
+
+
+def missing_features(chain, columns):
+    """Feature columns of the chain that are not among columns"""
+    present = set(columns)
+    return [column for column in feature_columns(chain) if column not in present]
+
+
+def score_frame(chain, df):
+    """Trending probability per horizon for every row of a feature frame
+
+    Raises ValueError if the frame lacks any of the chain's feature columns.
+    """
+    missing = missing_features(chain, df.columns)
+    if missing:
+        raise ValueError(f'missing feature columns: {", ".join(missing)}')
+    features = df[feature_columns(chain)].astype('float64').fillna(0)
+    selected = chain['selector'].transform(chain['scaler'].transform(features))
+    scores = {}
+    for horizon, model in chain['models'].items():
+        positive = list(model.classes_).index(1)
+        scores[horizon] = model.predict_proba(selected)[:, positive]
+    return pd.DataFrame(scores, index=df.index)
+
+
+def top_k_candidates(df, scores, top_k):
+    """Top-K rows per horizon, with the output columns and trend_probability"""
+    columns = [c for c in OUTPUT_COLUMNS if c in df.columns]
+    return {
+        horizon: df[columns].assign(trend_probability=scores[horizon].to_numpy()).nlargest(top_k, 'trend_probability')
+        for horizon in scores.columns
+    }
+
+
+_worker_chain = None
+
+
+def _init_worker(horizons):
+    global _worker_chain
+    # One core per worker process; parallelism comes from the pool
+    _worker_chain = load_scoring_chain(horizons, n_jobs=1)
+
+
+def _score_chunk(chunk, top_k):
+    return top_k_candidates(chunk, score_frame(_worker_chain, chunk), top_k)
+
+
+def iter_chunks(source, columns, chunk_size):
+    if source.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(source)
+        columns = [c for c in columns if c in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_size, usecols=lambda c: c in columns)
+
+
+def _merge(best, parts, top_k):
+    for horizon, part in parts.items():
+        best[horizon] = part if horizon not in best else (
+            pd.concat([best[horizon], part], ignore_index=True).nlargest(top_k, 'trend_probability')
+        )
+
+
+def run_batch_scoring(source=None, top_k=10, chunk_size=50000, workers=None, horizons=tuple(HORIZON_MODELS)):
+    """Score every candidate in source and return {horizon: top-K DataFrame}"""
+    source = source or csv_path('enhanced_trend_predictions')
+    workers = workers or os.cpu_count() or 1
+    columns = set(model_feature_columns()) | set(OUTPUT_COLUMNS)
+    chunks = iter_chunks(source, columns, chunk_size)
+    best = {}
+    if workers == 1:
+        chain = load_scoring_chain(horizons)
+        for chunk in chunks:
+            _merge(best, top_k_candidates(chunk, score_frame(chain, chunk), top_k), top_k)
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(horizons,)) as pool:
+            pending = set()
+            for chunk in chunks:
+                # Bound the number of chunks held in memory
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _merge(best, future.result(), top_k)
+                pending.add(pool.submit(_score_chunk, chunk, top_k))
+            for future in wait(pending).done:
+                _merge(best, future.result(), top_k)
+    return {horizon: df.reset_index(drop=True) for horizon, df in best.items()}
+
+
+def scores_path(horizon):
+    return os.path.join(SCORES_DIR, f'top_viral_videos_{horizon}.parquet')
+
+
+def write_scores(best):
+    os.makedirs(SCORES_DIR, exist_ok=True)
+    for horizon, df in best.items():
+        df.to_parquet(scores_path(horizon), index=False)
+
+
+@cached(lambda horizon, columns=None: [scores_path(horizon)] + source_paths())
+def load_top_videos(horizon, columns=None):
+    """Latest batch-scored top videos for a horizon, else the precomputed predictions (only the listed columns, if given)"""
+    if not os.path.exists(scores_path(horizon)):
+        return load_videos(columns, view=FALLBACK_TABLES[horizon])
+    scores = pd.read_parquet(scores_path(horizon))
+    if columns is None:
+        return with_video_columns(scores, table_columns('video_facts'))
+    df = with_video_columns(scores, columns)
+    return df[[column for column in columns if column in df.columns]]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score candidate videos with the 24h / 7d viral models')
+    parser.add_argument('source', nargs='?', help='CSV or Parquet file with the enhanced_trend_predictions schema')
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--horizons', nargs='+', default=list(HORIZON_MODELS), choices=list(HORIZON_MODELS))
+    args = parser.parse_args()
+    best = run_batch_scoring(args.source, args.top_k, args.chunk_size, args.workers, tuple(args.horizons))
+    write_scores(best)
+    for horizon, df in best.items():
+        print(f'{horizon}: wrote top {len(df)} to {scores_path(horizon)}')
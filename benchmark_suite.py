@@ -0,0 +1,306 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from snapshot_store import SNAPSHOT_DIR
+
+# Section Benchmark Suite
+#
+# Renders every dashboard section headlessly against synthetic snapshots that
+# are N times the size of the real one, to find where each tab stops scaling.
+# A synthetic snapshot is made of N jittered copies of every table in the
+# source snapshot folder, so schemas, nested columns (trend, country_info,
+# video_list, ...) and join keys stay exactly as they are. Copies get distinct
+# ids and names but share their trend series. Models and other non-CSV files
+# are linked in unchanged.
+#
+# Each (scale, section) pair runs in a fresh interpreter with streamlit
+# replaced by a recording stub, and the TIKTOK_SNAPSHOT_DIR environment
+# variable pointing at the synthetic folder. A run records:
+#   cold_s         first render (empty data cache; columnar and video fact files already built)
+#   warm_s         best of --repeat further renders
+#   peak_rss_mb    peak resident set size of the process
+#   alloc_peak_mb  peak traced Python allocations while rendering from an empty cache
+#   alloc_blocks   Python memory blocks still allocated after that render
+# plus any st.error / st.warning the section emitted. The results are written
+# as JSON, so runs from different releases can be compared.
+#
+#   python benchmark_suite.py [--scales 10 100 1000] [--sections 'Trending Songs' ...] [--output benchmark_results.json]
+
+DEFAULT_SCALES = (10, 100, 1000)
+# Tables whose size does not grow with the number of videos / entities
+FIXED_TABLES = (
+    'feature_importance', 'top10_hashtags_24h', 'top10_hashtags_7d', 'trend_correlation_matrix',
+    'trending_videos_by_keyword',
+)
+# Integer ids shifted per copy; the same shift in every table keeps joins intact
+ID_COLUMNS = ('id', 'item_id', 'hashtag_id', 'songID', 'clipID', 'user_id')
+# Names suffixed per copy so leaderboards and word clouds see distinct entities
+NAME_COLUMNS = ('hashtag_name', 'keyword', 'name', 'nick_name')
+ID_SHIFT = 1000003
+# Integer columns below this maximum (flags, ranks, durations) are not jittered
+JITTER_MIN_INT = 1000
+
+
+def _jitter_columns(df):
+    columns = []
+    for column in df.columns:
+        if column in ID_COLUMNS or column.startswith('Unnamed'):
+            continue
+        if pd.api.types.is_float_dtype(df[column]):
+            columns.append(column)
+        elif pd.api.types.is_integer_dtype(df[column]) and df[column].max() >= JITTER_MIN_INT:
+            columns.append(column)
+    return columns
+
+
+def scale_table(df, scale, seed=0):
+    """scale copies of a table with distinct ids / names and jittered measures"""
+    rng = np.random.default_rng(seed)
+    jitter = _jitter_columns(df)
+    copies = []
+    for copy in range(scale):
+        part = df.copy()
+        if copy:
+            for column in ID_COLUMNS:
+                if column in part.columns:
+                    part[column] = part[column] - copy * ID_SHIFT
+            for column in NAME_COLUMNS:
+                if column in part.columns:
+                    part[column] = part[column].astype(str) + f'_{copy}'
+            for column in jitter:
+                noise = rng.uniform(0.5, 1.5, len(part))
+                values = part[column] * noise
+                part[column] = values.round().astype(part[column].dtype) if pd.api.types.is_integer_dtype(part[column]) else values
+        copies.append(part)
+    scaled = pd.concat(copies, ignore_index=True)
+    for column in scaled.columns:
+        if column.startswith('Unnamed'):
+            scaled[column] = np.arange(len(scaled))
+    return scaled
+
+
+def generate_snapshot(scale, target_dir, source_dir=SNAPSHOT_DIR):
+    """Write a synthetic snapshot scale times the source one; returns {table: rows}"""
+    os.makedirs(target_dir, exist_ok=True)
+    rows = {}
+    for entry in sorted(os.listdir(source_dir)):
+        source = os.path.abspath(os.path.join(source_dir, entry))
+        target = os.path.join(target_dir, entry)
+        if not entry.endswith('.csv'):
+            # Models, dictionaries, ...; generated subfolders are rebuilt for the synthetic data
+            if os.path.isfile(source) and not os.path.exists(target):
+                os.symlink(source, target)
+            continue
+        name = entry[:-4]
+        df = pd.read_csv(source)
+        if name not in FIXED_TABLES:
+            df = scale_table(df, scale)
+        df.to_csv(target, index=False)
+        rows[name] = len(df)
+    return rows
+
+
+class StreamlitStub:
+    """Stands in for the streamlit module and every element it returns
+
+    Widgets return their default value, layout helpers return more stubs, and
+    everything else is a no-op. Error and warning messages are recorded.
+    """
+
+    def __init__(self, messages=None):
+        self.messages = [] if messages is None else messages
+        self.session_state = {}
+
+    def __getattr__(self, name):
+        return self._element
+
+    def _element(self, *args, **kwargs):
+        return StreamlitStub(self.messages)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def error(self, body, *args, **kwargs):
+        self.messages.append(f'error: {body}')
+
+    def warning(self, body, *args, **kwargs):
+        self.messages.append(f'warning: {body}')
+
+    def exception(self, exception, *args, **kwargs):
+        self.messages.append(f'error: {exception}')
+
+    def columns(self, spec, *args, **kwargs):
+        count = spec if isinstance(spec, int) else len(spec)
+        return [StreamlitStub(self.messages) for _ in range(count)]
+
+    def tabs(self, labels, *args, **kwargs):
+        return [StreamlitStub(self.messages) for _ in labels]
+
+    def selectbox(self, label, options, index=0, *args, **kwargs):
+        options = list(options)
+        return options[index] if options and index is not None else None
+
+    def radio(self, label, options, index=0, *args, **kwargs):
+        return self.selectbox(label, options, index)
+
+    def multiselect(self, label, options, default=None, *args, **kwargs):
+        return list(default or [])
+
+    def slider(self, label, min_value=None, max_value=None, value=None, *args, **kwargs):
+        return min_value if value is None else value
+
+    def checkbox(self, label, value=False, *args, **kwargs):
+        return value
+
+    def button(self, *args, **kwargs):
+        return False
+
+    def cache_data(self, func=None, **kwargs):
+        return func if func is not None else (lambda f: f)
+
+    cache_resource = cache_data
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return round(peak / (2 ** 20 if sys.platform == 'darwin' else 1024), 1)
+
+
+def measure_section(label, repeat=3):
+    """Render one section in this process with streamlit stubbed; returns the measurements"""
+    stub = StreamlitStub()
+    sys.modules['streamlit'] = stub
+    from data_cache import cache
+    from navigation import show_section
+    start = time.perf_counter()
+    show_section(label)
+    cold = time.perf_counter() - start
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        show_section(label)
+        warm.append(time.perf_counter() - start)
+    cache.clear()
+    tracemalloc.start()
+    show_section(label)
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    alloc_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+    return {
+        'cold_s': round(cold, 4),
+        'warm_s': round(min(warm), 4) if warm else None,
+        'peak_rss_mb': _peak_rss_mb(),
+        'alloc_peak_mb': round(alloc_peak / 2 ** 20, 2),
+        'alloc_blocks': alloc_blocks,
+        # Same message on every render; report each once
+        'messages': list(dict.fromkeys(stub.messages)),
+    }
+
+
+def _run_worker(args, snapshot_dir, timeout):
+    env = dict(os.environ, TIKTOK_SNAPSHOT_DIR=snapshot_dir)
+    # Benchmarks measure the dashboard itself, not a remote scoring service
+    env.pop('TIKTOK_SCORING_URL', None)
+    result = subprocess.run([sys.executable, os.path.abspath(__file__)] + args, cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env=env, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f'exit code {result.returncode}')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_suite(scales, sections, repeat=3, work_dir=None, keep_data=False, timeout=1800):
+    work_dir = work_dir or os.path.join(tempfile.gettempdir(), 'tiktok-benchmark')
+    report = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'commit': _git_commit(),
+        'scales': {},
+        'results': [],
+    }
+    for scale in scales:
+        snapshot_dir = os.path.join(work_dir, f'scale-{scale}')
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        rows = generate_snapshot(scale, snapshot_dir)
+        # Ingest once up front so per-section cold times do not depend on section order
+        ingest = _run_worker(['--ingest'], snapshot_dir, timeout)
+        report['scales'][str(scale)] = {'rows': rows, 'ingest_s': ingest['ingest_s']}
+        print(f'scale {scale}: {sum(rows.values())} rows, ingest {ingest["ingest_s"]:.2f}s', flush=True)
+        for label in sections:
+            entry = {'scale': scale, 'section': label}
+            try:
+                entry.update(_run_worker(['--section', label, '--repeat', str(repeat)], snapshot_dir, timeout))
+            except (RuntimeError, subprocess.TimeoutExpired) as e:
+                entry['failed'] = str(e)
+            report['results'].append(entry)
+            print(f'  {label:<22} {_summary(entry)}', flush=True)
+        if not keep_data:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+    return report
+
+
+def _summary(entry):
+    if 'failed' in entry:
+        return f'FAILED: {entry["failed"]}'
+    return (f'cold {entry["cold_s"]:.3f}s  warm {entry["warm_s"]:.3f}s  rss {entry["peak_rss_mb"]} MB  '
+            f'alloc {entry["alloc_peak_mb"]} MB' + (f'  ({len(entry["messages"])} messages)' if entry['messages'] else ''))
+
+
+def _git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark dashboard sections on synthetic snapshots of growing size')
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES))
+    parser.add_argument('--sections', nargs='+', help='section labels (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='warm renders per section')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--work-dir', help='where synthetic snapshots are generated (default: system temp dir)')
+    parser.add_argument('--keep-data', action='store_true', help='keep the synthetic snapshots after the run')
+    parser.add_argument('--timeout', type=int, default=1800, help='seconds per section run')
+    # Internal: run inside a worker process
+    parser.add_argument('--section', help=argparse.SUPPRESS)
+    parser.add_argument('--ingest', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.ingest:
+        from snapshot_store import ingest_snapshot
+        from video_facts import build_video_facts
+        start = time.perf_counter()
+        ingest_snapshot()
+        build_video_facts()
+        print(json.dumps({'ingest_s': round(time.perf_counter() - start, 4)}))
+    elif args.section:
+        print(json.dumps(measure_section(args.section, args.repeat)))
+    else:
+        sys.modules['streamlit'] = StreamlitStub()
+        from navigation import SECTIONS
+        sections = args.sections or list(SECTIONS)
+        unknown = set(sections) - set(SECTIONS)
+        if unknown:
+            parser.error(f'unknown sections: {", ".join(sorted(unknown))}')
+        report = run_suite(args.scales, sections, args.repeat, args.work_dir, args.keep_data, args.timeout)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Wrote {args.output}')
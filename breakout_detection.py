@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from data_cache import cached
+from partition_store import current_scope, load_scoped_trend_store, partition_paths
+from snapshot_store import csv_path
+
+# Breakout Detection
+#
+# Flags entities whose trend just broke out of its recent range. Every series
+# of a table is laid out as one dense (entities x periods) matrix; rolling
+# baselines come from cumulative sums along the time axis, so z-scores,
+# velocity and acceleration for all entities and periods are a handful of
+# array operations regardless of how many series there are. Periods without a
+# point count as 0 (the entity was not trending then). load_breakouts covers
+# the series of the dashboard's active selection (partition_store.use_scope).
+
+# Table -> (period in seconds, baseline window in periods)
+BREAKOUT_SETTINGS = {
+    'trending_hashtags': (86400, 7),
+    'trending_songs': (7 * 86400, 4),
+}
+Z_THRESHOLD = 2.0
+# Floor for the baseline std so flat-zero histories do not produce infinite z-scores
+MIN_STD = 0.05
+# A breakout is new if it did not cross the threshold in this many earlier periods
+LOOKBACK = 3
+
+
+def rolling_baseline(matrix, window):
+    """Mean and std of the preceding window periods for every cell (NaN for the first window periods)"""
+    rows, periods = matrix.shape
+    zeros = np.zeros((rows, 1))
+    sums = np.concatenate([zeros, np.cumsum(matrix, axis=1)], axis=1)
+    squares = np.concatenate([zeros, np.cumsum(matrix * matrix, axis=1)], axis=1)
+    mean = np.full(matrix.shape, np.nan)
+    std = np.full(matrix.shape, np.nan)
+    if periods > window:
+        # sums[:, t] - sums[:, t - window] is the total of periods t - window .. t - 1
+        mean[:, window:] = (sums[:, window:periods] - sums[:, :periods - window]) / window
+        second = (squares[:, window:periods] - squares[:, :periods - window]) / window
+        std[:, window:] = np.sqrt(np.maximum(second - mean[:, window:] ** 2, 0))
+    return mean, std
+
+
+def breakout_scores(matrix, window, z_threshold=Z_THRESHOLD, min_std=MIN_STD, lookback=LOOKBACK):
+    """Per-entity breakout statistics for the latest period of an (entities x periods) matrix"""
+    values = np.nan_to_num(matrix, nan=0.0)
+    mean, std = rolling_baseline(values, window)
+    scale = np.maximum(np.nan_to_num(std, nan=min_std), min_std)
+    with np.errstate(invalid='ignore'):
+        zscore = (values - mean) / scale
+        velocity = np.diff(values, axis=1, prepend=np.nan)
+        acceleration = np.diff(velocity, axis=1, prepend=np.nan)
+        crossed = (zscore >= z_threshold) & (velocity > 0)
+    previously = crossed[:, -1 - lookback:-1].any(axis=1)
+    # Rising faster than usual adds to the score; slowing down does not subtract
+    boost = np.clip(np.nan_to_num(acceleration[:, -1]) / scale[:, -1], 0, None)
+    return {
+        'latest_value': values[:, -1],
+        'baseline_mean': mean[:, -1],
+        'zscore': zscore[:, -1],
+        'velocity': velocity[:, -1],
+        'acceleration': acceleration[:, -1],
+        'breakout_score': np.nan_to_num(zscore[:, -1], nan=-np.inf) + boost,
+        'is_breakout': crossed[:, -1] & ~previously,
+    }
+
+
+def detect_breakouts(store, period, window, **kwargs):
+    """Breakout statistics of every series in a TrendStore, strongest first"""
+    matrix, period_starts = store.to_matrix(period)
+    if matrix.shape[1] <= window:
+        raise ValueError(f'need more than {window} periods of history, got {matrix.shape[1]}')
+    result = pd.DataFrame(breakout_scores(matrix, window, **kwargs), index=store.keys)
+    result.attrs['as_of'] = pd.to_datetime(period_starts[-1], unit='s')
+    return result.sort_values('breakout_score', ascending=False)
+
+
+@cached(csv_path, lambda name: partition_paths(f'{name}.trend'), context=current_scope)
+def load_breakouts(name):
+    """Breakout statistics for the trend series of a snapshot table (trending_hashtags, trending_songs) in the active scope"""
+    period, window = BREAKOUT_SETTINGS[name]
+    return detect_breakouts(load_scoped_trend_store(name), period, window)
@@ -0,0 +1,166 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from data_cache import cached
+from snapshot_store import SNAPSHOT_DIR, csv_path
+from topic_pipeline import model_version, part_paths
+from video_facts import load_video_rows
+
+# Correlation Engine
+#
+# Keeps trend_correlation_matrix current without rescanning history. The state
+# is a set of running moments (count, column means and the co-moment matrix)
+# that can be updated with a batch of new videos or merged with the moments of
+# another partition using the pairwise formulas of Chan, Golub & LeVeque, so
+# batches can be reduced by parallel workers. The state and the ids already
+# folded in are persisted as npz; each update reads the stored ids first and
+# scans only the assignment and video rows of ids not folded in yet.
+#
+#   python correlation_engine.py [--workers 4] [--rebuild]
+
+CORRELATION_DIR = os.path.join(SNAPSHOT_DIR, 'correlations')
+STATE_PATH = os.path.join(CORRELATION_DIR, 'moments.npz')
+MATRIX_TABLE = 'trend_correlation_matrix'
+BASE_COLUMNS = ['sentiment', 'subjectivity', 'entity_count']
+
+
+class RunningMoments:
+    def __init__(self, columns, count=0, mean=None, comoment=None):
+        self.columns = list(columns)
+        size = len(self.columns)
+        self.count = int(count)
+        self.mean = np.zeros(size) if mean is None else np.asarray(mean, dtype='float64')
+        self.comoment = np.zeros((size, size)) if comoment is None else np.asarray(comoment, dtype='float64')
+
+    @classmethod
+    def from_array(cls, columns, values):
+        """Moments of one batch (rows with missing values are skipped)"""
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values).any(axis=1)]
+        if not len(values):
+            return cls(columns)
+        mean = values.mean(axis=0)
+        centered = values - mean
+        return cls(columns, len(values), mean, centered.T @ centered)
+
+    def merge(self, other):
+        """Combine with the moments of a disjoint set of rows (in place)"""
+        if other.columns != self.columns:
+            raise ValueError(f'column mismatch: {other.columns} != {self.columns}')
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.comoment = other.count, other.mean.copy(), other.comoment.copy()
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * (self.count * other.count / count)
+        self.mean = self.mean + delta * (other.count / count)
+        self.count = count
+        return self
+
+    def update(self, values):
+        return self.merge(RunningMoments.from_array(self.columns, values))
+
+    def covariance(self, ddof=1):
+        return pd.DataFrame(self.comoment / max(self.count - ddof, 1), index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        scale = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoment / np.outer(scale, scale)
+        np.fill_diagonal(corr, 1.0)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+def correlation_frame(exclude=()):
+    """Per-video inputs of the matrix: topic assignments joined with sentiment and entity counts
+
+    Videos whose ids are in exclude are filtered out in the Parquet scans, so
+    only the remaining rows are read.
+    """
+    import pyarrow.dataset as ds
+    paths = part_paths(model_version())
+    if not paths:
+        raise ValueError('no topic assignments found; run `python topic_pipeline.py infer` first')
+    dataset = ds.dataset(paths)
+    topic_columns = [c for c in dataset.schema.names if c.startswith('topic_')]
+    # Later parts hold the latest assignment of a video, as in load_topic_assignments
+    assignments = dataset.to_table(
+        columns=['id', 'dominant_topic'] + topic_columns, filter=~ds.field('id').isin(list(exclude))
+    ).to_pandas().drop_duplicates('id', keep='last')
+    videos = load_video_rows(assignments['id'].tolist(), ['id'] + BASE_COLUMNS, view='full_df_with_entities')
+    frame = assignments.merge(videos, on='id')
+    return frame[['id', 'dominant_topic'] + BASE_COLUMNS + topic_columns]
+
+
+def load_state():
+    """(moments, ids already folded in), or (None, empty) before the first run or after a model change"""
+    if not os.path.exists(STATE_PATH):
+        return None, np.array([], dtype='int64')
+    state = np.load(STATE_PATH, allow_pickle=False)
+    if str(state['model']) != model_version():
+        # Topic columns of folded-in videos came from a replaced LDA model
+        return None, np.array([], dtype='int64')
+    moments = RunningMoments(state['columns'].tolist(), int(state['count']), state['mean'], state['comoment'])
+    return moments, state['ids']
+
+
+def save_state(moments, ids):
+    os.makedirs(CORRELATION_DIR, exist_ok=True)
+    tmp_path = f'{STATE_PATH}.tmp.npz'
+    np.savez(tmp_path, model=model_version(), columns=np.array(moments.columns), count=moments.count, mean=moments.mean,
+             comoment=moments.comoment, ids=np.asarray(ids, dtype='int64'))
+    os.replace(tmp_path, STATE_PATH)
+
+
+def _partial_moments(args):
+    columns, values = args
+    return RunningMoments.from_array(columns, values)
+
+
+def update_correlations(workers=1, chunk_size=50000, rebuild=False):
+    """Fold videos not seen yet into the running moments and rewrite the matrix; returns the count"""
+    moments, seen = (None, np.array([], dtype='int64')) if rebuild else load_state()
+    new = correlation_frame(seen)
+    columns = [c for c in new.columns if c != 'id']
+    if moments is None:
+        moments = RunningMoments(columns)
+    if new.empty:
+        return 0
+    values = new[columns].to_numpy(dtype='float64')
+    chunks = [(columns, values[start:start + chunk_size]) for start in range(0, len(values), chunk_size)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            partials = list(pool.map(_partial_moments, chunks))
+    else:
+        partials = [_partial_moments(chunk) for chunk in chunks]
+    for partial in partials:
+        moments.merge(partial)
+    save_state(moments, np.concatenate([seen, new['id'].to_numpy(dtype='int64')]))
+    write_matrix(moments)
+    return len(new)
+
+
+def write_matrix(moments):
+    path = csv_path(MATRIX_TABLE)
+    tmp_path = f'{path}.tmp'
+    moments.correlation().to_csv(tmp_path)
+    os.replace(tmp_path, path)
+
+
+@cached(csv_path(MATRIX_TABLE))
+def load_correlation_matrix():
+    return pd.read_csv(csv_path(MATRIX_TABLE), index_col=0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fold new videos into the trend correlation matrix')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--rebuild', action='store_true', help='discard the running moments and start over')
+    args = parser.parse_args()
+    count = update_correlations(args.workers, args.chunk_size, args.rebuild)
+    print(f'Folded {count} new videos into {csv_path(MATRIX_TABLE)}')
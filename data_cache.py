@@ -0,0 +1,155 @@
+import functools
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from profiling import span
+
+# Data Cache
+#
+# Process-wide memo for loaded frames, parsed trend structures and derived
+# aggregates. Entries are keyed on the function, its arguments and the
+# signature of every source file it depends on, so a new snapshot dropped into
+# the folder is picked up on the next rerun. Memory is bounded by an LRU budget.
+#
+# TIKTOK_CACHE_MB          memory budget in megabytes (default 512)
+# TIKTOK_CACHE_VALIDATION  'mtime' (default) or 'hash' to key on file contents
+
+CACHE_MB = float(os.environ.get('TIKTOK_CACHE_MB', 512))
+VALIDATION = os.environ.get('TIKTOK_CACHE_VALIDATION', 'mtime')
+
+
+def content_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+_hashes = {}
+
+
+def file_signature(path):
+    """Identify the current version of a source file (None if it does not exist)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (path, None)
+    if VALIDATION == 'hash':
+        # Re-hash only when the file was touched; an unchanged body keeps its key
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if _hashes.get(path, (None,))[0] != stamp:
+            _hashes[path] = (stamp, content_hash(path))
+        return (path, _hashes[path][1])
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def estimate_size(value):
+    """Approximate resident size of a cached value in bytes"""
+    if hasattr(value, 'memory_usage') and hasattr(value, 'index'):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class SnapshotCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            # Entries of an older snapshot can never be hit again
+            for stale in [k for k in self._entries if k[:2] == key[:2]]:
+                self.current_bytes -= self._entries.pop(stale)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'memory_mb': round(self.current_bytes / 2 ** 20, 2),
+                'budget_mb': round(self.max_bytes / 2 ** 20, 2),
+            }
+
+
+cache = SnapshotCache(int(CACHE_MB * 2 ** 20))
+
+
+def cached(*sources, context=None):
+    """Memoize a loader in the shared cache
+
+    Each source is a file path or a callable taking the loader's arguments and
+    returning a path (or list of paths) the result depends on. context, if
+    given, is called without arguments on every call and its (hashable) result
+    keys the entry alongside the arguments, for loaders that read ambient state
+    such as the partition scope. Cached values are shared between reruns and
+    sessions, so callers must not mutate them.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            paths = []
+            for source in sources:
+                resolved = source(*args, **kwargs) if callable(source) else source
+                paths.extend([resolved] if isinstance(resolved, str) else resolved)
+            call = (_freeze(args), _freeze(kwargs)) + ((context(),) if context is not None else ())
+            key = (name, call, tuple(file_signature(p) for p in paths))
+            with span(name, 'load'):
+                return cache.get_or_compute(key, lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import time
+import pandas as pd
+from data_cache import cached
+from snapshot_store import SNAPSHOT_DIR, csv_path, load_table
+
+# Feature Pipeline
+#
+# Incremental version of the enhanced_trend_predictions feature engineering.
+# Raw video rows (trending_videos_full schema) are fingerprinted; only new or
+# changed videos get their row features computed and appended as a part file.
+# Per-creator and per-song sums are kept as running aggregates and updated by
+# subtracting a changed video's previous contribution and adding the new one, so
+# a refresh costs O(delta). Features that depend on the clock or on other tables
+# (days_since_upload, has_top_hashtag) are derived when the features are loaded.
+#
+#   python feature_pipeline.py [source_table] [--compact]
+
+FEATURE_DIR = os.path.join(SNAPSHOT_DIR, 'features')
+MANIFEST_PATH = os.path.join(FEATURE_DIR, 'manifest.json')
+SOURCE_TABLE = 'trending_videos_full'
+# Raw columns a video's features are computed from; any change recomputes it
+RAW_COLUMNS = [
+    'title', 'desc', 'create_time', 'author_user_id', 'music_author', 'music_title', 'music_create_time',
+    'music_duration', 'music_id', 'collect_count', 'comment_count', 'digg_count', 'play_count', 'share_count',
+]
+COUNT_COLUMNS = ['digg_count', 'comment_count', 'share_count', 'collect_count']
+ENGAGEMENT_WEIGHTS = {'digg_count': 0.4, 'comment_count': 0.3, 'share_count': 0.2, 'collect_count': 0.1}
+# Running aggregates: name -> (group key, summed columns)
+AGGREGATES = {
+    'creator': ('author_user_id', ['play_count', 'digg_count']),
+    'song': ('music_id', ['play_count', 'digg_count']),
+}
+
+
+def video_ids(df):
+    """Video id column, taken from the video URL for inputs without one"""
+    if 'id' in df.columns:
+        return df['id'].astype('int64')
+    return df['video_url'].str.extract(r'/video/(\d+)', expand=False).astype('Int64')
+
+
+def row_fingerprints(df):
+    columns = [c for c in RAW_COLUMNS if c in df.columns]
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def _to_datetime(values):
+    # trending_videos_full stores epoch seconds, the enhanced table timestamps
+    if pd.api.types.is_numeric_dtype(values):
+        return pd.to_datetime(values, unit='s')
+    return pd.to_datetime(values, errors='coerce')
+
+
+def compute_row_features(df):
+    """Features that depend only on the video's own row"""
+    title = df['title'] if 'title' in df.columns else df['desc']
+    combined_text = (title.fillna('') + ' ' + df['desc'].fillna('')).str.strip()
+    hashtags = combined_text.str.lower().str.findall(r'#(\w+)')
+    create_time = _to_datetime(df['create_time'])
+    music_create_time = _to_datetime(df['music_create_time'])
+    play_count = df['play_count'].fillna(0)
+    features = pd.DataFrame({
+        'id': video_ids(df).to_numpy(),
+        'fingerprint': row_fingerprints(df),
+        'author_user_id': df['author_user_id'].to_numpy(),
+        'music_id': df['music_id'].to_numpy(),
+        'create_time': create_time.to_numpy(),
+        'play_count': play_count.to_numpy(),
+    }, index=df.index)
+    for column in COUNT_COLUMNS:
+        features[column] = df[column].fillna(0)
+        features[f'{column}_per_view'] = features[column] / (play_count + 1)
+    features['play_count_per_view'] = play_count / (play_count + 1)
+    features['engagement_score'] = sum(weight * features[column] for column, weight in ENGAGEMENT_WEIGHTS.items())
+    features['music_age_days'] = (music_create_time - create_time).dt.days.clip(lower=0).fillna(0)
+    features['is_original_sound'] = df['music_title'].fillna('').str.startswith('original sound').astype('int8')
+    features['all_hashtags'] = hashtags
+    features['num_hashtags'] = hashtags.str.len()
+    features['upload_hour'] = create_time.dt.hour
+    features['upload_dayofweek'] = create_time.dt.dayofweek
+    features['upload_month'] = create_time.dt.month
+    return features.reset_index(drop=True)
+
+
+def _read_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {'parts': [], 'aggregates': {}}
+    with open(MANIFEST_PATH) as f:
+        return json.load(f)
+
+
+def _feature_path(filename):
+    return os.path.join(FEATURE_DIR, filename)
+
+
+def _read_videos(manifest, columns=None):
+    if not manifest['parts']:
+        return pd.DataFrame(columns=columns or ['id', 'fingerprint'])
+    parts = [pd.read_parquet(_feature_path(part), columns=columns) for part in manifest['parts']]
+    # Parts are in commit order, so the last row of a video is its current version
+    return pd.concat(parts, ignore_index=True).drop_duplicates('id', keep='last')
+
+
+def _read_aggregate(manifest, name):
+    key, columns = AGGREGATES[name]
+    filename = manifest['aggregates'].get(name)
+    if filename is None:
+        return pd.DataFrame(columns=['video_count'] + columns, index=pd.Index([], name=key), dtype='float64')
+    return pd.read_parquet(_feature_path(filename))
+
+
+def _contributions(videos, key, columns):
+    return videos.assign(video_count=1).groupby(key)[['video_count'] + columns].sum()
+
+
+def _update_aggregate(stats, previous, current, name):
+    """Apply a delta: remove previous versions of changed videos, add their current versions"""
+    key, columns = AGGREGATES[name]
+    stats = stats.add(_contributions(current, key, columns), fill_value=0)
+    if len(previous):
+        stats = stats.sub(_contributions(previous, key, columns), fill_value=0)
+    return stats[stats['video_count'] > 0]
+
+
+def update_features(new_rows=None, source=SOURCE_TABLE):
+    """Compute features for new or changed videos and fold them into the running aggregates
+
+    new_rows is a frame of raw video rows (defaults to the whole source table);
+    returns the number of videos whose features were (re)computed.
+    """
+    raw = load_table(source) if new_rows is None else new_rows
+    raw = raw[video_ids(raw).notna().to_numpy()]
+    manifest = _read_manifest()
+    contribution_columns = sorted({key for key, _ in AGGREGATES.values()} | {c for _, cs in AGGREGATES.values() for c in cs})
+    known = _read_videos(manifest, columns=['id', 'fingerprint'] + contribution_columns)
+    candidates = pd.DataFrame({'id': video_ids(raw).astype('int64').to_numpy(), 'fingerprint': row_fingerprints(raw)})
+    # A re-sent unchanged row has the same fingerprint and is skipped
+    changed = ~candidates.merge(known[['id', 'fingerprint']], on=['id', 'fingerprint'], how='left', indicator=True)['_merge'].eq('both').to_numpy()
+    delta = raw[changed].assign(_id=candidates['id'].to_numpy()[changed]).drop_duplicates('_id', keep='last').drop(columns='_id')
+    if delta.empty:
+        return 0
+    features = compute_row_features(delta)
+    previous = known[known['id'].isin(features['id'])]
+
+    os.makedirs(FEATURE_DIR, exist_ok=True)
+    tag = time.strftime('%Y%m%d%H%M%S') + f'-{len(manifest["parts"]):05d}'
+    part = f'videos-{tag}.parquet'
+    features.to_parquet(_feature_path(part), index=False)
+    aggregates = {}
+    for name in AGGREGATES:
+        stats = _update_aggregate(_read_aggregate(manifest, name), previous, features, name)
+        aggregates[name] = f'{name}_stats-{tag}.parquet'
+        stats.to_parquet(_feature_path(aggregates[name]))
+    superseded = list(manifest['aggregates'].values())
+    # The manifest commits the refresh; files it does not list are ignored on read
+    tmp_path = MANIFEST_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'parts': manifest['parts'] + [part], 'aggregates': aggregates}, f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+    for filename in superseded:
+        os.remove(_feature_path(filename))
+    return len(features)
+
+
+def compact():
+    """Rewrite all parts as one, keeping only the current version of each video"""
+    manifest = _read_manifest()
+    if len(manifest['parts']) <= 1:
+        return
+    part = f'videos-{time.strftime("%Y%m%d%H%M%S")}-compacted.parquet'
+    _read_videos(manifest).to_parquet(_feature_path(part), index=False)
+    tmp_path = MANIFEST_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(dict(manifest, parts=[part]), f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+    for old in manifest['parts']:
+        os.remove(_feature_path(old))
+
+
+@cached(MANIFEST_PATH, csv_path('trending_hashtags'))
+def _load_joined(reference_time):
+    manifest = _read_manifest()
+    videos = _read_videos(manifest).reset_index(drop=True)
+    creators = _read_aggregate(manifest, 'creator')
+    songs = _read_aggregate(manifest, 'song')
+    creator_stats = creators.reindex(videos['author_user_id'])
+    song_stats = songs.reindex(videos['music_id'])
+    top_hashtags = set(load_table('trending_hashtags', columns=['hashtag_name'])['hashtag_name'].str.lower())
+    exploded = videos['all_hashtags'].explode()
+    return videos.drop(columns='fingerprint').assign(
+        creator_avg_play_count=(creator_stats['play_count'] / creator_stats['video_count']).fillna(0).to_numpy(),
+        creator_avg_digg_count=(creator_stats['digg_count'] / creator_stats['video_count']).fillna(0).to_numpy(),
+        song_video_count=song_stats['video_count'].fillna(0).to_numpy(),
+        song_avg_play_count=(song_stats['play_count'] / song_stats['video_count']).fillna(0).to_numpy(),
+        has_top_hashtag=exploded.isin(top_hashtags).groupby(level=0).any().astype('int8'),
+        days_since_upload=(reference_time - videos['create_time']).dt.days,
+    )
+
+
+def load_features(reference_time=None):
+    """Current features of every video, with aggregates and time-dependent columns joined in"""
+    # Rounded to the hour so reruns within the hour share one cache entry
+    return _load_joined(pd.Timestamp(reference_time or pd.Timestamp.now()).floor('h'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Incrementally update video features')
+    parser.add_argument('source', nargs='?', default=SOURCE_TABLE, help='snapshot table with raw video rows')
+    parser.add_argument('--compact', action='store_true', help='merge feature parts after updating')
+    args = parser.parse_args()
+    count = update_features(source=args.source)
+    print(f'Updated features for {count} videos')
+    if args.compact:
+        compact()
@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import pickle
+import pandas as pd
+from data_cache import content_hash, cached
+from snapshot_store import SNAPSHOT_DIR, csv_path
+from video_facts import load_videos
+
+# Forecast Materializer
+#
+# Runs the Prophet model once for the longest horizon and stores yhat and its
+# bounds for every configured horizon, tagged with the model file's hash, next to
+# the daily actuals. A manifest records the model and data hashes the tables were
+# built from, so inference only reruns when either file changes. The Trend
+# Forecast tab reads these small tables instead of calling predict().
+#
+#   python forecast_materializer.py [--horizons 7 30 90] [--force]
+
+PROPHET_PATH = os.path.join(SNAPSHOT_DIR, 'prophet_model.pkl')
+DATA_TABLE = 'enhanced_trend_predictions'
+FORECAST_DIR = os.path.join(SNAPSHOT_DIR, 'forecasts')
+FORECAST_PATH = os.path.join(FORECAST_DIR, 'prophet_forecast.parquet')
+ACTUALS_PATH = os.path.join(FORECAST_DIR, 'trend_actuals.parquet')
+MANIFEST_PATH = os.path.join(FORECAST_DIR, 'manifest.json')
+HORIZONS = (7, 30, 90)
+
+
+def _read_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH) as f:
+        return json.load(f)
+
+
+def _current_hashes():
+    return {
+        'model_hash': content_hash(PROPHET_PATH),
+        'data_hash': content_hash(csv_path(DATA_TABLE)),
+    }
+
+
+def is_fresh(horizons=HORIZONS):
+    manifest = _read_manifest()
+    return (
+        bool(manifest)
+        and {key: manifest.get(key) for key in ('model_hash', 'data_hash')} == _current_hashes()
+        and set(horizons) <= set(manifest.get('horizons', []))
+        and os.path.exists(FORECAST_PATH)
+        and os.path.exists(ACTUALS_PATH)
+    )
+
+
+def materialize_forecasts(horizons=HORIZONS, force=False):
+    """Predict once for the longest horizon and persist per-horizon forecasts; returns True if refreshed"""
+    horizons = sorted(set(horizons))
+    if not force and is_fresh(horizons):
+        return False
+    hashes = _current_hashes()
+    with open(PROPHET_PATH, 'rb') as f:
+        prophet_model = pickle.load(f)
+    df = load_videos(['create_time', 'is_trending'], view=DATA_TABLE)
+    ts_data = df.groupby(df['create_time'].dt.date)['is_trending'].sum().reset_index()
+    ts_data.columns = ['ds', 'y']
+    ts_data['ds'] = pd.to_datetime(ts_data['ds'])
+    future = prophet_model.make_future_dataframe(periods=max(horizons))
+    forecast = prophet_model.predict(future)[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+    # yhat for a date does not depend on the horizon, so every horizon is a slice
+    history_end = prophet_model.history['ds'].max()
+    frames = []
+    for horizon in horizons:
+        frame = forecast[forecast['ds'] <= history_end + pd.Timedelta(days=horizon)]
+        frames.append(frame.assign(horizon=horizon, model_hash=hashes['model_hash']))
+    os.makedirs(FORECAST_DIR, exist_ok=True)
+    pd.concat(frames, ignore_index=True).to_parquet(FORECAST_PATH, index=False)
+    ts_data.assign(data_hash=hashes['data_hash']).to_parquet(ACTUALS_PATH, index=False)
+    # The manifest is written last so a partial refresh is retried
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(dict(hashes, horizons=horizons), f, indent=2)
+    return True
+
+
+@cached(PROPHET_PATH, csv_path(DATA_TABLE))
+def load_forecast(horizon=30):
+    """(actuals, forecast) for one horizon, materializing first if the model or data changed"""
+    materialize_forecasts(sorted(set(HORIZONS) | {horizon}))
+    model_hash = _read_manifest()['model_hash']
+    forecast = pd.read_parquet(FORECAST_PATH, filters=[('horizon', '=', horizon), ('model_hash', '=', model_hash)])
+    actuals = pd.read_parquet(ACTUALS_PATH, columns=['ds', 'y'])
+    return actuals, forecast.drop(columns=['horizon', 'model_hash'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Materialize Prophet trend forecasts')
+    parser.add_argument('--horizons', type=int, nargs='+', default=list(HORIZONS))
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args()
+    refreshed = materialize_forecasts(args.horizons, force=args.force)
+    print('Forecasts refreshed' if refreshed else 'Forecasts already up to date')
@@ -0,0 +1,298 @@
+import argparse
+import collections
+import glob
+import hashlib
+import heapq
+import os
+import time
+from itertools import chain
+import pandas as pd
+from data_cache import cached
+from sentiment_pipeline import text_hashes
+from snapshot_store import SNAPSHOT_DIR, csv_path, load_table
+from video_facts import iter_video_batches, load_video_ids
+
+# Hashtag Matcher
+#
+# Tags video texts against the trending vocabulary (hashtag names from
+# trending_hashtags, keywords from trending_keywords) with one Aho-Corasick
+# automaton, so each text is scanned once however long the vocabulary is.
+# Matches must start and end on word boundaries. Texts are keyed by their sha1
+# and tagged once per vocabulary; tags are cached in part files like the
+# sentiment scores. The hashtag counts of each window (every hashtag of the
+# videos predicted to trend within it) are kept as running counts: a run reads
+# the window's ids and text hashes, loads the hashtags of only the videos that
+# entered or changed, and takes those that left from the stored state. The top
+# hashtags go to matches/top10_hashtags_<window>.parquet; the top10_hashtags_*
+# exports are left untouched. Uses pyahocorasick when it is installed and a
+# pure-Python automaton otherwise.
+#
+#   python hashtag_matcher.py [--batch-size 10000] [--rebuild]
+
+MATCH_DIR = os.path.join(SNAPSHOT_DIR, 'matches')
+VIDEO_TAGS_PATH = os.path.join(MATCH_DIR, 'video_tags.parquet')
+TEXT_COLUMN = 'combined_text'
+HASHTAG_PATTERN = r'#(\w+)'
+TAG_COLUMNS = ['all_hashtags', 'matched_hashtags', 'matched_keywords']
+# window -> (prediction export, flag of the videos whose hashtags are counted)
+HASHTAG_WINDOWS = {
+    '24h': ('predicted_viral_videos_next_24h', 'predicted_24h'),
+    '7d': ('predicted_viral_videos_next_7d', 'predicted_7d'),
+}
+TOP_N = 10
+# Videos folded into a window's counts, with the hashtags they contributed
+COUNTED_COLUMNS = ['id', 'text_hash', 'all_hashtags']
+
+
+class Automaton:
+    """Aho-Corasick automaton with the add_word / make_automaton / iter interface of pyahocorasick"""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+    def add_word(self, word, value):
+        node = 0
+        for char in word:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][char] = child
+            node = child
+        self._out[node].append(value)
+
+    def make_automaton(self):
+        # Breadth-first, so a node's failure link is final before its children's
+        queue = collections.deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter(self, text):
+        """(index of the last character, value) of every pattern occurrence in text"""
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for value in self._out[node]:
+                yield index, value
+
+
+def build_automaton(patterns):
+    """Automaton over {pattern: value}; pyahocorasick if available"""
+    try:
+        import ahocorasick
+        automaton = ahocorasick.Automaton()
+    except ImportError:
+        automaton = Automaton()
+    for pattern, value in patterns.items():
+        automaton.add_word(pattern, value)
+    automaton.make_automaton()
+    return automaton
+
+
+@cached(csv_path('trending_hashtags'), csv_path('trending_keywords'))
+def load_vocabulary():
+    """(trending hashtag names, trending keywords), lowercased and sorted"""
+    hashtags = load_table('trending_hashtags', columns=['hashtag_name'])['hashtag_name']
+    keywords = load_table('trending_keywords', columns=['keyword'])['keyword']
+    return tuple(
+        sorted({term.strip() for term in terms.dropna().astype(str).str.lower() if term.strip()})
+        for terms in (hashtags, keywords)
+    )
+
+
+def vocabulary_fingerprint(hashtags, keywords):
+    return hashlib.sha1(repr((hashtags, keywords)).encode()).hexdigest()[:12]
+
+
+class VocabularyMatcher:
+    """Finds the trending hashtags (#name) and keywords in lowercased texts in one pass"""
+
+    def __init__(self, hashtags, keywords):
+        patterns = {keyword: ('keyword', keyword) for keyword in keywords}
+        patterns.update({f'#{hashtag}': ('hashtag', hashtag) for hashtag in hashtags})
+        self.automaton = build_automaton(patterns) if patterns else None
+
+    @staticmethod
+    def _bounded(text, start, end):
+        # A pattern edge that is a word character must not continue a word
+        if text[start].isalnum() or text[start] == '_':
+            if start > 0 and (text[start - 1].isalnum() or text[start - 1] == '_'):
+                return False
+        if text[end].isalnum() or text[end] == '_':
+            if end + 1 < len(text) and (text[end + 1].isalnum() or text[end + 1] == '_'):
+                return False
+        return True
+
+    def match(self, text):
+        """(matched hashtag names, matched keywords), each distinct and in order of appearance"""
+        found = {'hashtag': {}, 'keyword': {}}
+        if self.automaton is not None and text:
+            for end, (kind, term) in self.automaton.iter(text):
+                length = len(term) + (kind == 'hashtag')
+                if self._bounded(text, end - length + 1, end):
+                    found[kind].setdefault(term)
+        return list(found['hashtag']), list(found['keyword'])
+
+
+def tag_texts(texts, matcher):
+    """all_hashtags / matched_hashtags / matched_keywords of each distinct text, indexed by text hash"""
+    texts = texts.fillna('').astype(str).str.lower()
+    unique = pd.Series(texts.to_numpy(), index=text_hashes(texts))
+    unique = unique[~unique.index.duplicated()]
+    matches = [matcher.match(text) for text in unique]
+    return pd.DataFrame({
+        'all_hashtags': unique.str.findall(HASHTAG_PATTERN).to_numpy(),
+        'matched_hashtags': [hashtags for hashtags, _ in matches],
+        'matched_keywords': [keywords for _, keywords in matches],
+    }, index=pd.Index(unique.index, name='text_hash'))
+
+
+def cache_paths(fingerprint='*'):
+    return sorted(glob.glob(os.path.join(MATCH_DIR, f'cache-{fingerprint}-*.parquet')))
+
+
+def load_tag_cache(fingerprint):
+    """Tags of every text matched against this vocabulary, indexed by text hash"""
+    paths = cache_paths(fingerprint)
+    if not paths:
+        return pd.DataFrame(columns=TAG_COLUMNS, index=pd.Index([], name='text_hash'))
+    parts = pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True)
+    return parts.drop_duplicates('text_hash', keep='last').set_index('text_hash')
+
+
+def _write_atomic(df, path, **kwargs):
+    tmp_path = f'{path}.tmp'
+    if path.endswith('.csv'):
+        df.to_csv(tmp_path, **kwargs)
+    else:
+        df.to_parquet(tmp_path, **kwargs)
+    os.replace(tmp_path, path)
+
+
+def tag_videos(batch_size=10000):
+    """Tag every video, matching only texts not tagged with the current vocabulary; returns (videos, newly matched)"""
+    hashtags, keywords = load_vocabulary()
+    fingerprint = vocabulary_fingerprint(hashtags, keywords)
+    matcher = VocabularyMatcher(hashtags, keywords)
+    os.makedirs(MATCH_DIR, exist_ok=True)
+    # Tags of an older vocabulary can never be used again
+    for path in set(cache_paths()) - set(cache_paths(fingerprint)):
+        os.remove(path)
+    tag_cache = load_tag_cache(fingerprint)
+    frames, matched = [], 0
+    for batch in iter_video_batches(['id', TEXT_COLUMN], batch_size=batch_size):
+        hashes = text_hashes(batch[TEXT_COLUMN].fillna('').astype(str).str.lower())
+        misses = ~pd.Index(hashes).isin(tag_cache.index)
+        if misses.any():
+            new_tags = tag_texts(batch.loc[misses, TEXT_COLUMN], matcher)
+            path = os.path.join(MATCH_DIR, f'cache-{fingerprint}-{time.strftime("%Y%m%d%H%M%S")}-{os.getpid()}-{len(frames):05d}.parquet')
+            _write_atomic(new_tags.reset_index(), path, index=False)
+            tag_cache = pd.concat([tag_cache, new_tags])
+            matched += len(new_tags)
+        frames.append(pd.DataFrame({'id': batch['id'].to_numpy(), 'text_hash': hashes}))
+    videos = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['id', 'text_hash'])
+    tags = tag_cache.reindex(videos['text_hash']).reset_index(drop=True)
+    videos = pd.concat([videos, tags], axis=1).assign(
+        num_hashtags=tags['all_hashtags'].str.len().fillna(0).astype('int16'),
+        has_top_hashtag=tags['matched_hashtags'].str.len().gt(0).astype('int8'),
+        has_trending_keyword=tags['matched_keywords'].str.len().gt(0).astype('int8'),
+    )
+    _write_atomic(videos, VIDEO_TAGS_PATH, index=False)
+    return len(videos), matched
+
+
+@cached(VIDEO_TAGS_PATH)
+def load_video_tags():
+    """Per-video tags of the latest tag_videos run (id, hashtags, matched vocabulary and flags)"""
+    return pd.read_parquet(VIDEO_TAGS_PATH)
+
+
+def _state_paths(window):
+    return os.path.join(MATCH_DIR, f'counts_{window}.parquet'), os.path.join(MATCH_DIR, f'counted_{window}.parquet')
+
+
+def top_hashtags_path(window):
+    return os.path.join(MATCH_DIR, f'top10_hashtags_{window}.parquet')
+
+
+def top_hashtags(counts, n=TOP_N):
+    """The n most frequent hashtags as [Hashtag, Count], ties broken by name"""
+    top = heapq.nsmallest(n, counts.items(), key=lambda item: (-item[1], item[0]))
+    return pd.DataFrame({'Hashtag': [f'#{tag}' for tag, _ in top], 'Count': [count for _, count in top]})
+
+
+@cached(lambda window: [top_hashtags_path(window), csv_path(f'top10_hashtags_{window}')])
+def load_top_hashtags(window):
+    """A window's top hashtags from the running counts, or from the top10_hashtags export before the first run"""
+    if os.path.exists(top_hashtags_path(window)):
+        return pd.read_parquet(top_hashtags_path(window))
+    return load_table(f'top10_hashtags_{window}')
+
+
+def _read_state(window):
+    counts_path, counted_path = _state_paths(window)
+    if not os.path.exists(counts_path) or not os.path.exists(counted_path):
+        return collections.Counter(), pd.DataFrame(columns=COUNTED_COLUMNS)
+    counts = pd.read_parquet(counts_path)
+    return collections.Counter(dict(zip(counts['hashtag'], counts['count']))), pd.read_parquet(counted_path)
+
+
+def _read_tags(ids, columns):
+    # Rows of the per-video tags for the given ids, filtered in the Parquet scan
+    import pyarrow.dataset as ds
+    return ds.dataset(VIDEO_TAGS_PATH).to_table(columns=columns, filter=ds.field('id').isin(list(ids))).to_pandas()
+
+
+def update_window_counts(window, rebuild=False):
+    """Fold the videos that entered, left or changed in a window into its hashtag counts; returns the delta size
+
+    Only the ids and text hashes of the window are read in full; hashtags are
+    read for the videos that entered or changed alone.
+    """
+    table, flag = HASHTAG_WINDOWS[window]
+    counts, counted = (collections.Counter(), pd.DataFrame(columns=COUNTED_COLUMNS)) if rebuild else _read_state(window)
+    keys = ['id', 'text_hash']
+    current = _read_tags(load_video_ids(table, flag, 1), keys)
+    # A video whose text changed leaves with its old hashtags and enters with its new ones
+    left = counted.merge(current, on=keys, how='left', indicator=True)
+    left = left[left['_merge'] == 'left_only']
+    entered = current.merge(counted[keys], on=keys, how='left', indicator=True)
+    entered = entered[entered['_merge'] == 'left_only'][keys]
+    entered = entered.merge(_read_tags(entered['id'], COUNTED_COLUMNS), on=keys)
+    top_path = top_hashtags_path(window)
+    if left.empty and entered.empty and os.path.exists(top_path) and not rebuild:
+        return 0
+    counts.subtract(chain.from_iterable(left['all_hashtags']))
+    counts.update(chain.from_iterable(entered['all_hashtags']))
+    counts = collections.Counter({tag: count for tag, count in counts.items() if count > 0})
+    counted = pd.concat([counted.merge(current, on=keys)[COUNTED_COLUMNS], entered[COUNTED_COLUMNS]], ignore_index=True)
+    counts_path, counted_path = _state_paths(window)
+    _write_atomic(pd.DataFrame({'hashtag': list(counts), 'count': list(counts.values())}), counts_path, index=False)
+    _write_atomic(counted, counted_path, index=False)
+    _write_atomic(top_hashtags(counts), top_path, index=False)
+    return len(left) + len(entered)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tag videos against the trending vocabulary and refresh the top hashtag counts')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--rebuild', action='store_true', help='discard the running hashtag counts and start over')
+    args = parser.parse_args()
+    count, matched = tag_videos(args.batch_size)
+    print(f'Tagged {count} videos ({matched} new texts matched)')
+    for window in HASHTAG_WINDOWS:
+        delta = update_window_counts(window, args.rebuild)
+        print(f'{window}: folded {delta} changed videos into {top_hashtags_path(window)}')
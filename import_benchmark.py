@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Import-Time Benchmark
+#
+# Imports each dashboard module in a fresh interpreter with `python -X importtime`
+# and records its cumulative import cost plus the heaviest packages it pulled in.
+# Fails (exit code 1) when a module exceeds its budget or eagerly imports one of
+# the modules that must stay deferred until a section renders. Streamlit itself
+# loads plotly.graph_objects, so only plotly.express is on the deferred list.
+#
+#   python import_benchmark.py [--budget import_budget.json] [--output import_times.json]
+
+DEFAULT_BUDGET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_budget.json')
+
+
+def _parse_importtime(stderr):
+    """Yield (depth, module, cumulative_us) from `python -X importtime` output"""
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        # Nesting is encoded as two extra spaces of indentation per level
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        yield depth, name.strip(), int(cumulative)
+
+
+def measure_import(module, cwd=None):
+    """Return (cumulative_ms, {direct dependency: cumulative_ms}, names of all loaded modules)"""
+    code = f'import sys, {module}; print(" ".join(sorted(sys.modules)))'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f'import {module} failed: {result.stderr.strip().splitlines()[-1]}')
+    # Children are reported before their parent, so collect depth-1 entries until
+    # the module's own depth-0 line shows up
+    children = {}
+    module_ms = 0.0
+    for depth, name, cumulative in _parse_importtime(result.stderr):
+        if depth == 0:
+            if name == module:
+                module_ms = cumulative / 1000
+                break
+            children = {}
+        elif depth == 1:
+            children[name] = cumulative / 1000
+    return module_ms, children, set(result.stdout.split())
+
+
+def run_benchmark(budget):
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    failures = []
+    for module, limit_ms in budget['modules'].items():
+        limit_ms = limit_ms or budget['default_ms']
+        module_ms, children, loaded = measure_import(module, cwd=cwd)
+        eager = [name for name in budget['deferred'] if any(m == name or m.startswith(name + '.') for m in loaded)]
+        results[module] = {
+            'import_ms': round(module_ms, 1),
+            'budget_ms': limit_ms,
+            'eager_heavy_imports': eager,
+            'top_dependencies_ms': dict(sorted(children.items(), key=lambda kv: -kv[1])[:5]),
+        }
+        if module_ms > limit_ms:
+            failures.append(f'{module}: {module_ms:.0f} ms exceeds budget of {limit_ms} ms')
+        if eager:
+            failures.append(f'{module}: eagerly imports {", ".join(eager)}')
+    return results, failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check per-module import time against a budget')
+    parser.add_argument('--budget', default=DEFAULT_BUDGET)
+    parser.add_argument('--output', help='write per-module results as JSON')
+    args = parser.parse_args()
+    with open(args.budget) as f:
+        budget = json.load(f)
+    results, failures = run_benchmark(budget)
+    for module, result in results.items():
+        print(f"{module:<24} {result['import_ms']:>8.1f} ms  (budget {result['budget_ms']} ms)")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if failures:
+        print('\nImport budget exceeded:')
+        for failure in failures:
+            print(f'  {failure}')
+        sys.exit(1)
@@ -0,0 +1,42 @@
+from data_cache import cached
+from partition_store import current_scope, load_scoped, load_scoped_trend_store, partition_paths
+from snapshot_store import csv_path
+
+# Industry Aggregation
+#
+# Builds the per-industry hashtag summary with grouped, vectorized operations.
+# The table covers the dashboard's active selection (partition_store.use_scope)
+# and is cached per snapshot and selection, so every tab and rerun shares one
+# computation.
+
+GROUP_COLUMNS = {
+    'country': 'country_name',
+    'industry': 'industry_name',
+}
+HASHTAG_COLUMNS = ['hashtag_id', 'hashtag_name', 'video_views', 'publish_cnt', 'rank'] + list(GROUP_COLUMNS.values())
+
+
+def build_industry_table(hashtags_df, trends, by=('industry',)):
+    """Summarize hashtags per industry (or per country and industry)"""
+    df = hashtags_df.assign(
+        trend_slope=trends.aggregate('slope').reindex(hashtags_df['hashtag_id']).fillna(0).to_numpy()
+    )
+    df = df.rename(columns={GROUP_COLUMNS[key]: key for key in by})
+    industry_df = df.groupby(list(by), sort=False, dropna=False, observed=True).agg(
+        hashtag_count=('hashtag_name', 'size'),
+        total_video_views=('video_views', 'sum'),
+        total_publish_cnt=('publish_cnt', 'sum'),
+        avg_rank=('rank', 'mean'),
+        hashtags=('hashtag_name', list),
+        avg_trend_growth=('trend_slope', 'mean'),
+    )
+    return industry_df.reset_index()
+
+
+@cached(csv_path('trending_hashtags'), lambda by=('industry',): partition_paths('trending_hashtags')
+        + partition_paths('trending_hashtags.trend'), context=current_scope)
+def load_industry_table(by=('industry',)):
+    """Industry summary of the trending hashtags in the active scope, computed once per snapshot and scope"""
+    return build_industry_table(
+        load_scoped('trending_hashtags', columns=HASHTAG_COLUMNS), load_scoped_trend_store('trending_hashtags'), tuple(by)
+    )
@@ -1,46 +1,25 @@
 import streamlit as st
-import plotly.express as px
-import pandas as pd
-import ast
+from industry_aggregation import load_industry_table
+
+def prefetch():
+    load_industry_table()
+    load_industry_table(by=('country', 'industry'))
 
 def show_industry_analytics(trending_hashtags_df=None, industry_df=None):
+    import plotly.express as px
     st.markdown('<h2 style="margin-bottom: 0.5em;">Industry Analysis</h2>', unsafe_allow_html=True)
-    if trending_hashtags_df is None or industry_df is None:
+    if industry_df is None:
         try:
-            trending_hashtags_df = pd.read_csv('back up tiktok/trending_hashtags.csv')
-            trending_hashtags_df['industry_info'] = trending_hashtags_df['industry_info'].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
-            trending_hashtags_df['trend'] = trending_hashtags_df['trend'].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
-            # --- Industry summary calculation ---
-            from collections import defaultdict
-            def calc_trend_slope(trend):
-                values = [point['value'] for point in trend]
-                if len(values) > 1:
-                    return (values[-1] - values[0]) / (len(values) - 1)
-                return 0
-            industry_summary = defaultdict(lambda: {
-                'hashtag_count': 0,
-                'total_video_views': 0,
-                'total_publish_cnt': 0,
-                'avg_rank': 0,
-                'hashtags': [],
-                'trend_slopes': []
-            })
-            for _, row in trending_hashtags_df.iterrows():
-                industry = row['industry_info']['value']
-                industry_summary[industry]['hashtag_count'] += 1
-                industry_summary[industry]['total_video_views'] += row['video_views']
-                industry_summary[industry]['total_publish_cnt'] += row['publish_cnt']
-                industry_summary[industry]['avg_rank'] += row['rank']
-                industry_summary[industry]['hashtags'].append(row['hashtag_name'])
-                slope = calc_trend_slope(row['trend'])
-                industry_summary[industry]['trend_slopes'].append(slope)
-            for summary in industry_summary.values():
-                summary['avg_rank'] /= summary['hashtag_count']
-                if summary['trend_slopes']:
-                    summary['avg_trend_growth'] = sum(summary['trend_slopes']) / len(summary['trend_slopes'])
-                del summary['trend_slopes']
-            industry_df = pd.DataFrame.from_dict(industry_summary, orient='index').reset_index()
-            industry_df.rename(columns={'index': 'industry'}, inplace=True)
+            # --- Industry summary (shared with the Hashtags tab, computed once per snapshot) ---
+            regional_df = load_industry_table(by=('country', 'industry'))
+            countries = sorted(regional_df['country'].dropna().astype(str).unique())
+            region = 'All regions'
+            if len(countries) > 1:
+                region = st.selectbox('Region:', ['All regions'] + countries, key='industry_region')
+            if region == 'All regions':
+                industry_df = load_industry_table()
+            else:
+                industry_df = regional_df[regional_df['country'] == region]
         except Exception as e:
             st.error(f'Could not read or process trending_hashtags.csv: {e}')
             return
@@ -0,0 +1,294 @@
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+from data_cache import cached
+from partition_store import current_scope, load_scoped, partition_paths
+import snapshot_store
+from snapshot_store import SNAPSHOT_DIR, columnar_path, csv_path, load_table, schema_is_current
+
+# Leaderboards
+#
+# Every metric leaderboard of a snapshot table is computed in one pass with
+# np.argpartition and persisted next to the snapshot, so a section reads K rows
+# instead of sorting the whole table on each render. Each board keeps
+# TOP_K * BUFFER_FACTOR candidates plus a threshold: every row outside the buffer
+# is no better than it. Updated rows are merged into the buffer in O(buffer);
+# a board is rebuilt from the full table only when fewer than K candidates
+# remain above the threshold (e.g. after top rows lost ground or were removed).
+# The ingest CLI (python snapshot_store.py) ingests through
+# ingest_with_leaderboards, which hands refresh_leaderboards the rows before and
+# after a new snapshot, so only rows that changed are merged. Tables ingested
+# lazily by the loaders have their boards rebuilt on the next load instead.
+#
+#   python leaderboards.py [table ...]
+
+LEADERBOARD_DIR = os.path.join(SNAPSHOT_DIR, 'leaderboards')
+TOP_K = 10
+BUFFER_FACTOR = 5
+# table -> key column, label column shown next to the metric, {metric: ascending}
+BOARDS = {
+    'trending_hashtags': {
+        'key': 'hashtag_id',
+        'label': 'hashtag_name',
+        'metrics': {'rank': True, 'video_views': False, 'publish_cnt': False},
+    },
+    'trending_creators': {
+        'key': 'user_id',
+        'label': 'nick_name',
+        'metrics': {'follower_cnt': False, 'liked_cnt': False},
+    },
+    'trending_keywords': {
+        'key': 'keyword',
+        'label': 'keyword',
+        'metrics': {'ctr': False, 'cvr': False, 'play_six_rate': False, 'engagement': False, 'post_change': False},
+    },
+    'trending_challenges': {
+        'key': 'name',
+        'label': 'name',
+        'metrics': {'userCount': False, 'viewCount': False},
+    },
+}
+# Metrics that are not stored columns
+DERIVED_METRICS = {
+    'engagement': lambda df: df['like'] + df['comment'] + df['share'],
+}
+# Columns each derived metric is computed from
+DERIVED_INPUTS = {
+    'engagement': ['like', 'comment', 'share'],
+}
+
+
+def _paths(name):
+    base = os.path.join(LEADERBOARD_DIR, name)
+    return f'{base}.parquet', f'{base}.json'
+
+
+def board_columns(name, metrics=None):
+    """Columns needed to rank a table on the given metrics (default: all of its boards)"""
+    spec = BOARDS[name]
+    columns = [spec['key'], spec['label']]
+    for metric in metrics or spec['metrics']:
+        columns.extend(DERIVED_INPUTS.get(metric, [metric]))
+    return list(dict.fromkeys(columns))
+
+
+def _metric_values(df, metric):
+    if metric in df.columns:
+        return df[metric]
+    return DERIVED_METRICS[metric](df)
+
+
+def top_k_positions(values, k, ascending=False):
+    """Row positions of the k best values in order (NaN last), via partial selection"""
+    scores = np.asarray(values, dtype='float64')
+    scores = scores if ascending else -scores
+    scores = np.where(np.isnan(scores), np.inf, scores)
+    if k < len(scores):
+        candidates = np.argpartition(scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.lexsort((candidates, scores[candidates]))]
+
+
+def _board_rows(df, spec, metric, positions):
+    rows = df.iloc[positions]
+    board = pd.DataFrame({'key': rows[spec['key']].to_numpy(), 'label': rows[spec['label']].to_numpy()})
+    board['value'] = _metric_values(rows, metric).to_numpy(dtype='float64')
+    return board.assign(board=metric)
+
+
+def _threshold(values, ascending, capacity, total):
+    # The worst buffered value bounds every row outside the buffer; None when nothing is outside
+    if total <= capacity:
+        return None
+    return float(values.max() if ascending else values.min())
+
+
+def build_leaderboards(name, df=None, capacity=TOP_K * BUFFER_FACTOR):
+    """Compute and persist every board of a table from the full snapshot"""
+    spec = BOARDS[name]
+    df = load_table(name, columns=board_columns(name)) if df is None else df
+    boards = []
+    meta = {'capacity': capacity, 'boards': {}}
+    for metric, ascending in spec['metrics'].items():
+        if metric not in df.columns and metric not in DERIVED_METRICS:
+            continue
+        values = _metric_values(df, metric)
+        board = _board_rows(df, spec, metric, top_k_positions(values, capacity, ascending))
+        boards.append(board)
+        meta['boards'][metric] = {
+            'ascending': ascending,
+            # Values are buffered as float64; served boards are cast back
+            'dtype': str(values.dtype),
+            'threshold': _threshold(board['value'].dropna(), ascending, capacity, len(df)),
+        }
+    _write(name, pd.concat(boards, ignore_index=True), meta)
+    return meta
+
+
+def _write(name, boards, meta):
+    parquet_path, meta_path = _paths(name)
+    os.makedirs(LEADERBOARD_DIR, exist_ok=True)
+    boards.to_parquet(parquet_path, index=False)
+    # Metadata last: a board file without matching metadata is treated as missing
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+def _read(name, current_only=True):
+    parquet_path, meta_path = _paths(name)
+    if not (os.path.exists(parquet_path) and os.path.exists(meta_path)):
+        return None, None
+    if current_only and os.path.getmtime(meta_path) < os.path.getmtime(csv_path(name)):
+        # Built from an older snapshot
+        return None, None
+    with open(meta_path) as f:
+        return pd.read_parquet(parquet_path), json.load(f)
+
+
+def _is_exact(board, info, k):
+    """Whether the buffer still holds a provably correct top-k"""
+    if info['threshold'] is None:
+        return True
+    values = board['value']
+    trusted = values <= info['threshold'] if info['ascending'] else values >= info['threshold']
+    return int(trusted.sum()) >= k
+
+
+def update_leaderboards(name, rows=None, removed_keys=(), df=None):
+    """Merge changed rows (full records) and removed keys into the persisted boards
+
+    Boards left by the previous snapshot are updated too. df, the full table,
+    is only read when no boards exist yet. Returns the metrics whose buffers no
+    longer guarantee a correct top-K; those are rebuilt from the full table on
+    their next load.
+    """
+    spec = BOARDS[name]
+    boards, meta = _read(name, current_only=False)
+    if boards is None:
+        build_leaderboards(name, df)
+        return []
+    capacity = meta['capacity']
+    touched = set(removed_keys)
+    if rows is not None:
+        touched |= set(rows[spec['key']])
+    updated, stale = [], []
+    for metric, info in meta['boards'].items():
+        board = boards[boards['board'] == metric]
+        board = board[~board['key'].isin(touched)]
+        if rows is not None and len(rows):
+            board = pd.concat([board, _board_rows(rows, spec, metric, np.arange(len(rows)))], ignore_index=True)
+        order = top_k_positions(board['value'], len(board), info['ascending'])
+        board = board.iloc[order]
+        trimmed = board.iloc[capacity:]['value'].dropna()
+        board = board.iloc[:capacity]
+        if len(trimmed):
+            # Trimmed rows join the unbuffered rows; the bound moves up to the best of them
+            best_trimmed = float(trimmed.min() if info['ascending'] else trimmed.max())
+            if info['threshold'] is None:
+                info['threshold'] = best_trimmed
+            else:
+                info['threshold'] = min(info['threshold'], best_trimmed) if info['ascending'] else max(info['threshold'], best_trimmed)
+        if not _is_exact(board, info, TOP_K):
+            stale.append(metric)
+        updated.append(board)
+    _write(name, pd.concat(updated, ignore_index=True), meta)
+    return stale
+
+
+def boarded_rows(name, path):
+    """Board columns of an ingested copy of a table, or None if its boards were not built from it"""
+    meta_path = _paths(name)[1]
+    if name not in BOARDS or not os.path.exists(meta_path) or os.path.getmtime(meta_path) < os.path.getmtime(path):
+        return None
+    import pyarrow.parquet as pq
+    available = set(pq.read_schema(path).names)
+    return pd.read_parquet(path, columns=[column for column in board_columns(name) if column in available])
+
+
+def _changed_rows(name, previous, current):
+    # Rows of current that are new or differ from previous on a board column, and the keys that disappeared
+    key = BOARDS[name]['key']
+    columns = [column for column in board_columns(name) if column in current.columns and column in previous.columns]
+    old = previous[columns].astype(object).drop_duplicates(key, keep=False).set_index(key)
+    new = current[columns].astype(object).drop_duplicates(key, keep=False).set_index(key)
+    common = new.index.intersection(old.index)
+    a, b = new.loc[common], old.loc[common, new.columns]
+    same = (a.eq(b).fillna(False).astype(bool) | (a.isna() & b.isna())).all(axis=1)
+    unchanged = common[same.to_numpy()]
+    removed = pd.Index(previous[key]).difference(pd.Index(current[key]))
+    return current[~current[key].isin(unchanged)], removed.tolist()
+
+
+def refresh_leaderboards(name, previous, current):
+    """Bring a table's boards up to date with a new snapshot, given its rows before (None if unknown) and after
+
+    Returns the metrics left to be rebuilt on their next load, as update_leaderboards.
+    """
+    if name not in BOARDS:
+        return []
+    current = current[[column for column in board_columns(name) if column in current.columns]]
+    if previous is None:
+        build_leaderboards(name, current)
+        return []
+    rows, removed = _changed_rows(name, previous, current)
+    return update_leaderboards(name, rows, removed, df=current)
+
+
+def ingest_with_leaderboards(name):
+    """snapshot_store.ingest_table, then fold the table's changes into its boards; returns the ingested frame"""
+    path = columnar_path(name)
+    # The last ingested copy, for the boards to diff against
+    previous = boarded_rows(name, path) if os.path.exists(path) and schema_is_current(name, path) else None
+    df = snapshot_store.ingest_table(name)
+    refresh_leaderboards(name, previous, df)
+    return df
+
+
+@cached(lambda name: csv_path(name), lambda name: _paths(name))
+def _load_boards(name):
+    boards, meta = _read(name)
+    if boards is None:
+        build_leaderboards(name)
+        boards, meta = _read(name)
+    return boards, meta
+
+
+def _scoped_leaderboard(name, metric, k):
+    # A country / date selection is a small slice of the archive; rank its rows directly
+    spec = BOARDS[name]
+    df = load_scoped(name, columns=board_columns(name, [metric]))
+    values = _metric_values(df, metric)
+    rows = df.iloc[top_k_positions(values, k, spec['metrics'][metric])]
+    return pd.DataFrame({spec['label']: rows[spec['label']].to_numpy(), metric: _metric_values(rows, metric).to_numpy()})
+
+
+def load_leaderboard(name, metric, k=TOP_K):
+    """Top-k rows of one board as a [label, metric] frame, best first (within the active scope, if any)"""
+    if current_scope() is not None and partition_paths(name):
+        return _scoped_leaderboard(name, metric, k)
+    spec = BOARDS[name]
+    boards, meta = _load_boards(name)
+    info = meta['boards'][metric]
+    board = boards[boards['board'] == metric]
+    if not _is_exact(board, info, k):
+        # The buffer cannot prove its order any more; fall back to a full pass
+        build_leaderboards(name, capacity=max(meta['capacity'], k * BUFFER_FACTOR))
+        boards, meta = _load_boards(name)
+        board = boards[boards['board'] == metric]
+    board = board.head(k)
+    values = board['value']
+    if not values.isna().any():
+        values = values.astype(info['dtype'])
+    return pd.DataFrame({spec['label']: board['label'].to_numpy(), metric: values.to_numpy()})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the metric leaderboards of snapshot tables')
+    parser.add_argument('tables', nargs='*', default=list(BOARDS), choices=list(BOARDS))
+    args = parser.parse_args()
+    for table in args.tables:
+        meta = build_leaderboards(table)
+        print(f'{table}: {", ".join(meta["boards"])}')
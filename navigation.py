@@ -0,0 +1,78 @@
+import contextvars
+import importlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from plot_utils import configure_plotly_defaults
+from profiling import span
+
+# Section Navigation
+#
+# Registry of dashboard sections. Only the active section's module is imported
+# and rendered on a rerun; the next section in the bar is warmed in a background
+# thread through its module's prefetch() (data loading only, no Streamlit calls),
+# so switching to it mostly hits the data cache. A failed prefetch is logged and
+# listed in the diagnostics panel until the section prefetches cleanly.
+
+SECTIONS = {
+    'Trend Forecast': ('trend_forecast', 'show_trend_forecast'),
+    'Trending Creators': ('trending_creators', 'show_trending_creators'),
+    'Trending Songs': ('trending_songs', 'show_trending_songs'),
+    'Trending Keywords': ('trending_keywords', 'show_trending_keywords'),
+    'Trending Hashtags': ('trending_hashtags', 'show_trending_hashtags'),
+    'Trending Challenges': ('trending_challenges', 'show_trending_challenges'),
+    'Industry Analysis': ('industry_analytics', 'show_industry_analytics'),
+    'Emerging Topics': ('topic_modeling', 'show_topic_modeling'),
+    'Breakouts': ('trend_breakouts', 'show_trend_breakouts'),
+}
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='section-prefetch')
+_pending = {}
+_failures = {}
+_lock = threading.Lock()
+logger = logging.getLogger(__name__)
+
+
+def show_section(label):
+    configure_plotly_defaults()
+    module_name, function_name = SECTIONS[label]
+    with span(label, 'section'):
+        getattr(importlib.import_module(module_name), function_name)()
+
+
+def next_section(label):
+    labels = list(SECTIONS)
+    return labels[(labels.index(label) + 1) % len(labels)]
+
+
+def _prefetch(label):
+    try:
+        module = importlib.import_module(SECTIONS[label][0])
+        prefetch = getattr(module, 'prefetch', None)
+        if prefetch is not None:
+            prefetch()
+    except Exception as e:
+        # The section shows its own error when it renders
+        logger.exception('Prefetch of section %r failed', label)
+        _failures[label] = f'{type(e).__name__}: {e}'
+    else:
+        _failures.pop(label, None)
+
+
+def prefetch_failures():
+    """{section: error} of the sections whose last prefetch failed"""
+    return dict(_failures)
+
+
+def prefetch_section(label):
+    """Warm a section's loaders in the background; a no-op while one is already running
+
+    Runs in a copy of the caller's context, so the prefetch loads the same
+    country / date scope the section will render.
+    """
+    with _lock:
+        future = _pending.get(label)
+        if future is not None and not future.done():
+            return future
+        _pending[label] = _executor.submit(contextvars.copy_context().run, _prefetch, label)
+        return _pending[label]
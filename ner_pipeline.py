@@ -0,0 +1,90 @@
+import argparse
+import glob
+import os
+import time
+import pandas as pd
+from snapshot_store import SNAPSHOT_DIR
+from video_facts import VIEWS, load_videos
+
+# NER Pipeline
+#
+# Offline named-entity extraction for video titles. Titles are streamed through
+# spaCy's nlp.pipe in batches (optionally across worker processes) with only the
+# components NER needs enabled. Each batch appends a part file of
+# (video_id, entity_text, label) rows plus the ids it processed, so a rerun only
+# handles videos it has not seen. The dashboard just aggregates this table.
+#
+#   python ner_pipeline.py [--workers 4] [--batch-size 2000]
+
+NER_DIR = os.path.join(SNAPSHOT_DIR, 'ner')
+SPACY_MODEL = 'en_core_web_sm'
+NER_COMPONENTS = ('tok2vec', 'ner')
+ENTITY_COLUMNS = ['video_id', 'entity_text', 'label']
+
+
+def part_paths(kind='*'):
+    return sorted(glob.glob(os.path.join(NER_DIR, f'{kind}-*.parquet')))
+
+
+def _committed(path):
+    # A batch counts once its processed-ids part exists (written last)
+    return os.path.exists(path.replace(os.sep + 'entities-', os.sep + 'processed-'))
+
+
+def _read_parts(kind, columns):
+    paths = [path for path in part_paths(kind) if _committed(path)]
+    if not paths:
+        return pd.DataFrame(columns=columns)
+    return pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True)
+
+
+def load_entities():
+    """All extracted entities as (video_id, entity_text, label) rows"""
+    return _read_parts('entities', ENTITY_COLUMNS)
+
+
+def load_processed_ids():
+    return _read_parts('processed', ['video_id'])['video_id']
+
+
+def _load_nlp():
+    import spacy
+    nlp = spacy.load(SPACY_MODEL)
+    nlp.select_pipes(enable=[name for name in NER_COMPONENTS if name in nlp.pipe_names])
+    return nlp
+
+
+def _write_part(kind, df, tag):
+    df.to_parquet(os.path.join(NER_DIR, f'{kind}-{tag}.parquet'), index=False)
+
+
+def run_ner_pipeline(source='full_df_with_entities', batch_size=2000, n_process=1, pipe_batch_size=64):
+    """Extract entities for every video in the source table not processed yet; returns the count"""
+    videos = load_videos(['id', 'title'], view=source)
+    pending = videos[~videos['id'].isin(load_processed_ids())].drop_duplicates('id')
+    if pending.empty:
+        return 0
+    os.makedirs(NER_DIR, exist_ok=True)
+    nlp = _load_nlp()
+    run_tag = time.strftime('%Y%m%d%H%M%S')
+    for part, start in enumerate(range(0, len(pending), batch_size)):
+        chunk = pending.iloc[start:start + batch_size]
+        texts = zip(chunk['title'].fillna('').astype(str), chunk['id'])
+        rows = []
+        for doc, video_id in nlp.pipe(texts, as_tuples=True, batch_size=pipe_batch_size, n_process=n_process):
+            rows.extend((video_id, ent.text, ent.label_) for ent in doc.ents)
+        tag = f'{run_tag}-{part:05d}'
+        # The processed part commits the batch; an interrupted batch is redone on the next run
+        _write_part('entities', pd.DataFrame(rows, columns=ENTITY_COLUMNS), tag)
+        _write_part('processed', pd.DataFrame({'video_id': chunk['id'].to_numpy()}), tag)
+    return len(pending)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract named entities for unseen video titles')
+    parser.add_argument('--source', default='full_df_with_entities', choices=list(VIEWS))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    args = parser.parse_args()
+    count = run_ner_pipeline(args.source, batch_size=args.batch_size, n_process=args.workers)
+    print(f'Processed {count} new videos')
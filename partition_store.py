@@ -0,0 +1,196 @@
+import argparse
+import collections
+import contextlib
+import contextvars
+import datetime
+import glob
+import os
+import shutil
+import pandas as pd
+from data_cache import cached
+from snapshot_store import SNAPSHOT_DIR, TREND_KEYS, csv_path, load_table, load_trend
+from trend_store import TrendStore, load_trend_store
+
+# Partition Store
+#
+# Archives snapshots as Parquet partitions laid out as
+#   partitions/<table>/country=<code>/snapshot_date=<YYYY-MM-DD>/part.parquet
+# (trend points under <table>.trend, partitioned by their entity's country).
+# Loaders prune partitions by directory name before opening any file and push
+# the industry filter and column projection into the Parquet scan, so the cost
+# of a selection scales with its own size rather than with the archive. Rows
+# without a country (and tables such as trending_keywords that have none) are
+# stored under country=ALL and belong to every country selection.
+#
+# The dashboard's selection is held in a context variable: inside
+# `with use_scope(...)` the load_scoped* loaders read only the selected
+# partitions; without a scope, or before any partition exists, they fall back
+# to the flat snapshot.
+#
+#   python partition_store.py [--date YYYY-MM-DD] [table ...]
+
+PARTITION_DIR = os.path.join(SNAPSHOT_DIR, 'partitions')
+PART_FILE = 'part.parquet'
+# The first of these columns present in a table gives the row's partition country
+COUNTRY_COLUMNS = ('country_code', 'country_id')
+GLOBAL_COUNTRY = 'ALL'
+INDUSTRY_COLUMN = 'industry_name'
+
+Scope = collections.namedtuple('Scope', ['countries', 'dates', 'industries'])
+_scope = contextvars.ContextVar('snapshot_scope', default=None)
+
+
+def partition_path(name, country, snapshot_date):
+    return os.path.join(PARTITION_DIR, name, f'country={country}', f'snapshot_date={snapshot_date}', PART_FILE)
+
+
+def _partition_keys(path):
+    country_dir, date_dir = path.split(os.sep)[-3:-1]
+    return country_dir.split('=', 1)[1], date_dir.split('=', 1)[1]
+
+
+def partition_paths(name, countries=None, dates=None):
+    """Part files of a table in the selection, pruned on directory names alone"""
+    paths = []
+    for path in sorted(glob.glob(partition_path(glob.escape(name), '*', '*'))):
+        country, snapshot_date = _partition_keys(path)
+        if countries is not None and country not in countries and country != GLOBAL_COUNTRY:
+            continue
+        if dates is not None and snapshot_date not in dates:
+            continue
+        paths.append(path)
+    return paths
+
+
+def partition_index():
+    """(table, country, snapshot_date) of every stored partition"""
+    rows = []
+    for path in sorted(glob.glob(partition_path('*', '*', '*'))):
+        rows.append((os.path.relpath(path, PARTITION_DIR).split(os.sep)[0],) + _partition_keys(path))
+    return pd.DataFrame(rows, columns=['table', 'country', 'snapshot_date'])
+
+
+def _row_countries(df):
+    for column in COUNTRY_COLUMNS:
+        if column in df.columns:
+            return df[column].astype('string').replace('', pd.NA).fillna(GLOBAL_COUNTRY).to_numpy(dtype=object)
+    return pd.Series(GLOBAL_COUNTRY, index=df.index).to_numpy(dtype=object)
+
+
+def _write_parts(name, df, countries, snapshot_date):
+    written = set()
+    for country, part in df.groupby(countries, sort=False):
+        path = partition_path(name, country, snapshot_date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        part.to_parquet(f'{path}.tmp', index=False)
+        os.replace(f'{path}.tmp', path)
+        written.add(path)
+    # Re-partitioning a date drops countries that are no longer in it
+    for path in set(partition_paths(name, dates=[snapshot_date])) - written:
+        shutil.rmtree(os.path.dirname(path))
+
+
+def write_partitions(name, snapshot_date=None):
+    """Archive the current snapshot of a table (and its trend points) under snapshot_date
+
+    snapshot_date defaults to the modification date of the table's CSV.
+    """
+    if snapshot_date is None:
+        snapshot_date = datetime.date.fromtimestamp(os.path.getmtime(csv_path(name))).isoformat()
+    df = load_table(name)
+    countries = _row_countries(df)
+    _write_parts(name, df, countries, snapshot_date)
+    if name in TREND_KEYS:
+        key = TREND_KEYS[name]
+        points = load_trend(name)
+        entity_countries = pd.Series(countries, index=df[key].to_numpy()).groupby(level=0).first()
+        point_countries = entity_countries.reindex(points[key].to_numpy()).fillna(GLOBAL_COUNTRY).to_numpy(dtype=object)
+        _write_parts(f'{name}.trend', points, point_countries, snapshot_date)
+    return snapshot_date
+
+
+def _dataset(name, paths):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    partitioning = ds.partitioning(pa.schema([('country', pa.string()), ('snapshot_date', pa.string())]), flavor='hive')
+    return ds.dataset(paths, format='parquet', partitioning=partitioning,
+                      partition_base_dir=os.path.join(PARTITION_DIR, name))
+
+
+@cached(lambda name, countries=None, dates=None, industries=None, columns=None: partition_paths(name, countries, dates))
+def load_partitioned(name, countries=None, dates=None, industries=None, columns=None):
+    """Rows of the selected partitions, with the industry filter and columns pushed into the scan
+
+    Rows carry country / snapshot_date columns from their partition path. An
+    empty selection returns an empty frame with the table's columns.
+    """
+    import pyarrow.dataset as ds
+    paths = partition_paths(name, countries, dates)
+    # An empty selection still reads one file's schema for the column layout
+    dataset = _dataset(name, paths or partition_paths(name)[:1])
+    row_filter = None
+    if industries is not None and INDUSTRY_COLUMN in dataset.schema.names:
+        row_filter = ds.field(INDUSTRY_COLUMN).isin(list(industries))
+    if columns is not None:
+        # Columns the table does not have are skipped, as in snapshot_store.load_table
+        columns = [column for column in columns if column in dataset.schema.names]
+    table = dataset.to_table(columns=columns, filter=row_filter)
+    return table.slice(0, 0 if not paths else len(table)).to_pandas()
+
+
+def _as_tuple(values):
+    return None if values is None else tuple(sorted(values))
+
+
+@contextlib.contextmanager
+def use_scope(countries=None, dates=None, industries=None):
+    """Restrict the load_scoped* loaders to a selection (None = no restriction) within the block"""
+    token = _scope.set(Scope(_as_tuple(countries), _as_tuple(dates), _as_tuple(industries)))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def current_scope():
+    """The active Scope, or None outside use_scope or before any partition was written"""
+    scope = _scope.get()
+    return scope if scope is not None and os.path.isdir(PARTITION_DIR) else None
+
+
+def load_scoped(name, columns=None):
+    """A snapshot table restricted to the active scope (the flat snapshot when unscoped or unpartitioned)"""
+    scope = current_scope()
+    if scope is None or not partition_paths(name):
+        return load_table(name, columns=columns)
+    return load_partitioned(name, scope.countries, scope.dates, scope.industries, columns)
+
+
+def load_scoped_trend_store(name):
+    """TrendStore of a table's entities within the active scope"""
+    scope = current_scope()
+    if scope is None or not partition_paths(f'{name}.trend'):
+        return load_trend_store(name)
+    return _scoped_trend_store(name, *scope)
+
+
+@cached(lambda name, countries, dates, industries: partition_paths(name, countries, dates)
+        + partition_paths(f'{name}.trend', countries, dates))
+def _scoped_trend_store(name, countries, dates, industries):
+    key = TREND_KEYS[name]
+    points = load_partitioned(f'{name}.trend', countries, dates, columns=[key, 'date', 'value'])
+    if industries is not None:
+        keys = load_partitioned(name, countries, dates, industries, columns=[key])[key]
+        points = points[points[key].isin(keys)]
+    # Partitions are read in date order, so the latest snapshot wins for repeated points
+    return TrendStore.from_frame(points.drop_duplicates([key, 'date'], keep='last'), key)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Archive snapshot tables as country / snapshot_date partitions')
+    parser.add_argument('tables', nargs='*')
+    parser.add_argument('--date', help='snapshot date (YYYY-MM-DD); defaults to each CSV\'s modification date')
+    args = parser.parse_args()
+    tables = args.tables or sorted(f[:-4] for f in os.listdir(SNAPSHOT_DIR) if f.endswith('.csv'))
+    for table in tables:
+        print(f'{table}: snapshot_date={write_partitions(table, args.date)}')
@@ -1,4 +1,31 @@
-import plotly.graph_objects as go
+_plotly_configured = False
+
+# Scatter rendering: SVG markers up to WEBGL_THRESHOLD rows, WebGL up to
+# DENSITY_THRESHOLD rows, then a server-side DENSITY_BINS x DENSITY_BINS density
+# heatmap, so the payload sent to the browser stays bounded
+WEBGL_THRESHOLD = 1000
+DENSITY_THRESHOLD = 50000
+DENSITY_BINS = 100
+
+def configure_plotly_defaults():
+    """Apply the dashboard's dark plotly theme once, on first chart render"""
+    global _plotly_configured
+    if _plotly_configured:
+        return
+    import plotly.express as px
+    import plotly.io as pio
+    # Configure plotly theme for dark mode
+    template = pio.templates["plotly_dark"]
+    template.layout.update(
+        paper_bgcolor="rgba(26, 32, 44, 0.0)",
+        plot_bgcolor="rgba(26, 32, 44, 0.0)",
+        font_color="#e2e8f0"
+    )
+    pio.templates.default = template
+    # Update plotly express defaults
+    px.defaults.template = "plotly_dark"
+    px.defaults.color_continuous_scale = "blues"
+    _plotly_configured = True
 
 def apply_white_theme(fig):
     """Apply consistent dark theme to plotly figures"""
@@ -45,3 +72,45 @@ def apply_white_theme(fig):
         )
     )
     return fig
+
+def density_heatmap(df, x, y, bins=DENSITY_BINS, labels=None, title=None, color_continuous_scale=None):
+    """2D histogram of x / y computed with numpy and drawn as a single heatmap trace"""
+    import numpy as np
+    import plotly.graph_objects as go
+    labels = labels or {}
+    xs = df[x].to_numpy(dtype='float64')
+    ys = df[y].to_numpy(dtype='float64')
+    finite = np.isfinite(xs) & np.isfinite(ys)
+    counts, x_edges, y_edges = np.histogram2d(xs[finite], ys[finite], bins=bins)
+    x_label, y_label = labels.get(x, x), labels.get(y, y)
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        # Empty bins are left transparent
+        z=np.where(counts.T > 0, counts.T, np.nan),
+        colorscale=color_continuous_scale or 'Blues',
+        colorbar=dict(title='Count'),
+        hovertemplate=f'{x_label}: %{{x}}<br>{y_label}: %{{y}}<br>Count: %{{z}}<extra></extra>'
+    ))
+    fig.update_layout(
+        title=f'{title or ""} (binned, {int(finite.sum()):,} points)',
+        xaxis_title=x_label,
+        yaxis_title=y_label
+    )
+    return fig
+
+def scalable_scatter(df, x, y, webgl_threshold=WEBGL_THRESHOLD, density_threshold=DENSITY_THRESHOLD, bins=DENSITY_BINS, **kwargs):
+    """px.scatter that switches to WebGL for large frames and to a binned heatmap for very large ones"""
+    if len(df) > density_threshold:
+        return density_heatmap(
+            df, x, y, bins,
+            labels=kwargs.get('labels'),
+            title=kwargs.get('title'),
+            color_continuous_scale=kwargs.get('color_continuous_scale')
+        )
+    import plotly.express as px
+    return px.scatter(df, x=x, y=y, render_mode='webgl' if len(df) > webgl_threshold else 'svg', **kwargs)
+
+def update_markers(fig, **props):
+    """update_traces for the marker traces of a scalable_scatter figure (skips the density heatmap)"""
+    return fig.update_traces(selector=lambda trace: trace.type != 'heatmap', **props)
@@ -0,0 +1,280 @@
+import contextlib
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# Section Profiling
+#
+# Opt-in instrumentation of one dashboard run. While a RunProfile is active,
+# spans are recorded for the section (navigation.show_section), every cached
+# loader (data_cache.cached: file I/O, literal_eval, model inference, ...) and
+# every chart / table / image handed to Streamlit (serialization). A span's self
+# time excludes its children, so a section's own self time is the compute spent
+# between loads and renders. With memory tracking, each span also records the
+# change in traced Python memory; with sampling, a background thread records
+# the render thread's stack every few milliseconds.
+#
+# Runs can be exported as Chrome trace JSON (chrome://tracing, Perfetto).
+# Nothing is recorded, and the hooks cost a context-variable lookup, when no
+# profile is active.
+#
+# TIKTOK_PROFILE  comma-separated default modes: timers, memory, sample
+
+PROFILE_MODES = {mode.strip() for mode in os.environ.get('TIKTOK_PROFILE', '').split(',') if mode.strip()}
+SAMPLE_INTERVAL = 0.005
+# Streamlit elements whose calls are timed as render spans
+RENDER_ELEMENTS = (
+    'plotly_chart', 'dataframe', 'table', 'image', 'pyplot', 'altair_chart', 'bar_chart', 'line_chart', 'json',
+)
+
+_active = contextvars.ContextVar('run_profile', default=None)
+_hooks_installed = False
+_hooks_lock = threading.Lock()
+
+
+class StackSampler(threading.Thread):
+    """Records the stack of one thread at a fixed interval"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = []
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.samples.append((time.perf_counter_ns(), tuple(reversed(stack))))
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+class RunProfile:
+    """Spans (and optional stack samples) of one section render"""
+
+    def __init__(self, label, memory=False, sample=False):
+        self.label = label
+        self.memory = memory
+        self.sample = sample
+        self.spans = []
+        self.samples = []
+        self.thread_id = threading.get_ident()
+        self.started_ns = self.finished_ns = None
+        self._open = []
+        self._sampler = None
+        self._owns_tracemalloc = False
+
+    def _traced(self):
+        return tracemalloc.get_traced_memory()[0] if self.memory else None
+
+    @contextlib.contextmanager
+    def span(self, name, phase):
+        if threading.get_ident() != self.thread_id:
+            # Only the render thread is profiled
+            yield
+            return
+        record = {'name': name, 'phase': phase, 'depth': len(self._open), 'children_ns': 0,
+                  'memory_start': self._traced(), 'start_ns': time.perf_counter_ns()}
+        self._open.append(record)
+        try:
+            yield
+        finally:
+            record['end_ns'] = time.perf_counter_ns()
+            self._open.pop()
+            duration = record['end_ns'] - record['start_ns']
+            record['self_ns'] = duration - record.pop('children_ns')
+            if self._open:
+                self._open[-1]['children_ns'] += duration
+            start_memory = record.pop('memory_start')
+            record['memory_delta'] = None if start_memory is None else self._traced() - start_memory
+            self.spans.append(record)
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        if self.sample:
+            self._sampler = StackSampler(self.thread_id)
+            self._sampler.start()
+        self.started_ns = time.perf_counter_ns()
+
+    def stop(self):
+        self.finished_ns = time.perf_counter_ns()
+        if self._sampler is not None:
+            self._sampler.stop()
+            self.samples = self._sampler.samples
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+    def phase_totals(self):
+        """Self milliseconds per phase; the section's own self time is its compute"""
+        totals = Counter()
+        for record in self.spans:
+            totals['compute' if record['phase'] == 'section' else record['phase']] += record['self_ns'] / 1e6
+        return {phase: round(totals[phase], 2) for phase in ('load', 'compute', 'render')}
+
+    def span_rows(self):
+        """One row per span in start order, for display"""
+        rows = []
+        for record in sorted(self.spans, key=lambda r: r['start_ns']):
+            row = {
+                'span': '  ' * record['depth'] + record['name'],
+                'phase': record['phase'],
+                'total_ms': round((record['end_ns'] - record['start_ns']) / 1e6, 2),
+                'self_ms': round(record['self_ns'] / 1e6, 2),
+            }
+            if self.memory:
+                row['memory_mb'] = round(record['memory_delta'] / 2 ** 20, 2)
+            rows.append(row)
+        return rows
+
+    def hot_functions(self, n=15):
+        """(function, % of samples on top of the stack, % of samples anywhere in the stack)"""
+        if not self.samples:
+            return []
+        own, anywhere = Counter(), Counter()
+        for _, stack in self.samples:
+            own[stack[-1]] += 1
+            anywhere.update(set(stack))
+        total = len(self.samples)
+        return [
+            {'function': name, 'self_pct': round(100 * count / total, 1), 'total_pct': round(100 * anywhere[name] / total, 1)}
+            for name, count in own.most_common(n)
+        ]
+
+    def chrome_trace(self):
+        """The run as a Chrome trace-event document (spans as complete events, samples as stack samples)"""
+        pid = os.getpid()
+
+        def micros(ns):
+            return (ns - self.started_ns) / 1000
+
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': self.thread_id, 'args': {'name': 'render'}}]
+        for record in self.spans:
+            args = {'self_ms': round(record['self_ns'] / 1e6, 3)}
+            if record['memory_delta'] is not None:
+                args['memory_delta_bytes'] = record['memory_delta']
+            events.append({
+                'name': record['name'], 'cat': record['phase'], 'ph': 'X', 'pid': pid, 'tid': self.thread_id,
+                'ts': micros(record['start_ns']), 'dur': (record['end_ns'] - record['start_ns']) / 1000, 'args': args,
+            })
+        trace = {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'section': self.label}}
+        if self.samples:
+            frames, frame_ids, samples = {}, {}, []
+            for timestamp, stack in self.samples:
+                parent = None
+                for name in stack:
+                    key = (parent, name)
+                    if key not in frame_ids:
+                        frame_ids[key] = str(len(frame_ids))
+                        frames[frame_ids[key]] = {'name': name, 'category': 'python'}
+                        if parent is not None:
+                            frames[frame_ids[key]]['parent'] = parent
+                    parent = frame_ids[key]
+                samples.append({'cpu': 0, 'tid': self.thread_id, 'ts': micros(timestamp), 'name': 'sample', 'sf': parent, 'weight': 1})
+            trace['stackFrames'] = frames
+            trace['samples'] = samples
+        return trace
+
+    def save_trace(self, directory=None):
+        """Write the Chrome trace under <snapshot dir>/traces (or directory); returns the path"""
+        if directory is None:
+            from snapshot_store import SNAPSHOT_DIR
+            directory = os.path.join(SNAPSHOT_DIR, 'traces')
+        os.makedirs(directory, exist_ok=True)
+        slug = ''.join(c if c.isalnum() else '-' for c in self.label.lower())
+        path = os.path.join(directory, f'{time.strftime("%Y%m%d-%H%M%S")}-{slug}.json')
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+
+def current_profile():
+    return _active.get()
+
+
+@contextlib.contextmanager
+def span(name, phase):
+    """Time a block under the active profile; a no-op when profiling is off"""
+    profile = _active.get()
+    if profile is None:
+        yield
+        return
+    with profile.span(name, phase):
+        yield
+
+
+@contextlib.contextmanager
+def profile_run(label, memory=False, sample=False):
+    """Profile the enclosed section render; yields the RunProfile"""
+    install_render_hooks()
+    profile = RunProfile(label, memory, sample)
+    token = _active.set(profile)
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+        _active.reset(token)
+
+
+def show_profile(container, profile, trace_path=None):
+    """Render a finished profile into a Streamlit container (e.g. the diagnostics expander)"""
+    totals = profile.phase_totals()
+    for column, phase in zip(container.columns(3), ('load', 'compute', 'render')):
+        column.metric(phase.title(), f'{totals[phase]:.0f} ms')
+    container.dataframe(profile.span_rows(), hide_index=True)
+    hot = profile.hot_functions()
+    if hot:
+        container.markdown(f'**Hottest functions** ({len(profile.samples)} samples)')
+        container.dataframe(hot, hide_index=True)
+    container.download_button(
+        'Download Chrome trace',
+        json.dumps(profile.chrome_trace()),
+        file_name=os.path.basename(trace_path) if trace_path else 'trace.json',
+        mime='application/json'
+    )
+    if trace_path:
+        container.caption(f'Saved to {trace_path}')
+
+
+def _timed_element(name, method):
+    def wrapper(*args, **kwargs):
+        if _active.get() is None:
+            return method(*args, **kwargs)
+        with span(f'st.{name}', 'render'):
+            return method(*args, **kwargs)
+    wrapper.__wrapped__ = method
+    return wrapper
+
+
+def install_render_hooks():
+    """Route Streamlit chart / table / image calls through render spans (once per process)"""
+    global _hooks_installed
+    with _hooks_lock:
+        if _hooks_installed:
+            return
+        import streamlit as st
+        from streamlit.delta_generator import DeltaGenerator
+        for name in RENDER_ELEMENTS:
+            # st.<name> is bound to the main container at import; columns and
+            # expanders go through the DeltaGenerator method
+            if hasattr(DeltaGenerator, name):
+                setattr(DeltaGenerator, name, _timed_element(name, getattr(DeltaGenerator, name)))
+            if hasattr(st, name):
+                setattr(st, name, _timed_element(name, getattr(st, name)))
+        _hooks_installed = True
@@ -0,0 +1,215 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Schema Registry
+#
+# Declares the columns of every snapshot file and the compact dtype each one
+# is stored with: categoricals for low-cardinality labels, the smallest integer
+# type for flags / ranks / small counts, float32 for rates and scores. Columns
+# declared as None keep their ingested dtype: ids, free text, and the raw
+# view / like counts that are summed across many rows. The dtypes are applied
+# once, when snapshot_store ingests a CSV; the registry fingerprint is stored in
+# the Parquet file, so changing a dtype here re-ingests that table.
+
+CATEGORY = 'category'
+
+VIDEO_SCHEMA = {
+    'country_code': CATEGORY,
+    'cover': None,
+    'duration': 'int32',
+    'id': None,
+    'item_id': None,
+    'item_url': None,
+    'region': CATEGORY,
+    'title': None,
+}
+VIDEO_DETAIL_SCHEMA = {
+    'desc': None,
+    'create_time': None,
+    'author_user_id': None,
+    'music_author': None,
+    'music_title': None,
+    'music_create_time': None,
+    'music_duration': 'float32',
+    'music_id': None,
+    'collect_count': None,
+    'comment_count': None,
+    'digg_count': None,
+    'forward_count': None,
+    'play_count': None,
+    'share_count': None,
+    'video_url': None,
+}
+VIDEO_FEATURE_SCHEMA = {
+    'video_length_sec': 'int32',
+    'has_caption': 'int8',
+    'combined_text': None,
+    'text_length': 'int32',
+    'word_count': 'int16',
+    'sentiment': 'float32',
+    'subjectivity': 'float32',
+    'creator_user_id': None,
+    'is_top_creator': 'int8',
+    'follower_cnt': None,
+    'liked_cnt': None,
+    'play_count_per_view': 'float32',
+    'digg_count_per_view': 'float32',
+    'comment_count_per_view': 'float32',
+    'share_count_per_view': 'float32',
+    'collect_count_per_view': 'float32',
+    'engagement_score': 'float32',
+    'is_original_sound': 'int8',
+    'music_age_days': 'float32',
+    'creator_avg_play_count': 'float32',
+    'creator_avg_digg_count': 'float32',
+    'song_rank': 'float32',
+    'is_trending_song': 'int8',
+    'song_trend_value': 'float32',
+    'all_hashtags': None,
+    'has_top_hashtag': 'int8',
+    'num_hashtags': 'int16',
+    'has_trending_keyword': 'int8',
+    'upload_hour': 'float32',
+    'upload_dayofweek': 'float32',
+    'upload_month': 'float32',
+    'days_since_upload': 'float32',
+    'is_trending': 'int8',
+}
+NLP_SCHEMA = {
+    'trend_probability': 'float32',
+    'predicted_trend': 'int8',
+    'dominant_topic': 'int8',
+    'sentiment_category': CATEGORY,
+}
+ENTITY_SCHEMA = {'entity_count': 'int16'}
+PREDICTION_SCHEMA = {
+    'predicted_trending': 'int8',
+    'is_trending_24h': 'int8',
+    'is_trending_7d': 'int8',
+    'predicted_24h': 'int8',
+    'predicted_7d': 'int8',
+}
+SELECTION_SCHEMA = {'predicted_trending': 'int8', 'prediction_time': None}
+TOP_HASHTAG_SCHEMA = {'Hashtag': None, 'Count': 'int32'}
+
+# table -> {column: compact dtype or None}
+SCHEMAS = {
+    'trending_videos': VIDEO_SCHEMA,
+    'trending_videos_full': VIDEO_DETAIL_SCHEMA,
+    'enhanced_trend_predictions': {**VIDEO_SCHEMA, **VIDEO_DETAIL_SCHEMA, **VIDEO_FEATURE_SCHEMA},
+    'full_df_with_sentiment_topics': {**VIDEO_SCHEMA, **VIDEO_DETAIL_SCHEMA, **VIDEO_FEATURE_SCHEMA, **NLP_SCHEMA},
+    'full_df_with_entities': {
+        **VIDEO_SCHEMA, **VIDEO_DETAIL_SCHEMA, **VIDEO_FEATURE_SCHEMA, **NLP_SCHEMA, **ENTITY_SCHEMA,
+    },
+    'predicted_viral_videos': {
+        **VIDEO_SCHEMA, **VIDEO_DETAIL_SCHEMA, **VIDEO_FEATURE_SCHEMA, **SELECTION_SCHEMA,
+    },
+    'predicted_viral_videos_next_24h': {**VIDEO_SCHEMA, **VIDEO_DETAIL_SCHEMA, **VIDEO_FEATURE_SCHEMA, **PREDICTION_SCHEMA},
+    'predicted_viral_videos_next_7d': {**VIDEO_SCHEMA, **VIDEO_DETAIL_SCHEMA, **VIDEO_FEATURE_SCHEMA, **PREDICTION_SCHEMA},
+    # country_info / industry_info are decoded into *_id / *_name / *_label at ingest; trend goes to a side table
+    'trending_hashtags': {
+        'hashtag_id': None,
+        'hashtag_name': None,
+        'country_id': CATEGORY,
+        'country_name': CATEGORY,
+        'country_label': CATEGORY,
+        'industry_id': CATEGORY,
+        'industry_name': CATEGORY,
+        'industry_label': CATEGORY,
+        'creators': None,
+        'publish_cnt': None,
+        'video_views': None,
+        'rank': 'int16',
+        'rank_diff': 'float32',
+        'rank_diff_type': 'int8',
+    },
+    'trending_songs': {
+        'author': None,
+        'clipID': None,
+        'country_code': CATEGORY,
+        'duration': 'int16',
+        'link': None,
+        'promoted': None,
+        'rank': 'int16',
+        'songID': None,
+        'title': None,
+        'urlTitle': None,
+    },
+    'trending_creators': {
+        'user_id': None,
+        'nick_name': None,
+        'avatar_url': None,
+        'country_code': CATEGORY,
+        'follower_cnt': None,
+        'liked_cnt': None,
+        'tt_link': None,
+        'tcm_link': None,
+    },
+    'trending_keywords': {
+        'Unnamed: 0': None,
+        'comment': None,
+        'cost': None,
+        'cpa': 'float32',
+        'ctr': 'float32',
+        'cvr': 'float32',
+        'impression': None,
+        'keyword': None,
+        'like': None,
+        'play_six_rate': 'float32',
+        'post_change': 'float32',
+        'share': None,
+        'video_list': None,
+    },
+    'trending_challenges': {
+        'type': CATEGORY,
+        'name': None,
+        'desc': None,
+        'userCount': None,
+        'viewCount': None,
+    },
+    'trending_videos_by_keyword': {'0': None},
+    'top10_hashtags_24h': TOP_HASHTAG_SCHEMA,
+    'top10_hashtags_7d': TOP_HASHTAG_SCHEMA,
+    'feature_importance': {'feature': None, 'importance': 'float32'},
+    # Normalized video tables written by video_facts; every column lives in exactly one
+    'video_facts': {**VIDEO_SCHEMA, **VIDEO_DETAIL_SCHEMA},
+    'video_features': VIDEO_FEATURE_SCHEMA,
+    'video_nlp': {**NLP_SCHEMA, **ENTITY_SCHEMA},
+    'video_predictions': SELECTION_SCHEMA,
+    'video_predictions_24h': PREDICTION_SCHEMA,
+    'video_predictions_7d': PREDICTION_SCHEMA,
+    'video_exports': {'export': CATEGORY, 'id': None},
+}
+
+
+def table_schema(name):
+    """{column: compact dtype or None} of a table; empty for tables without a declaration"""
+    return SCHEMAS.get(name, {})
+
+
+def schema_fingerprint(name):
+    return hashlib.sha1(repr(sorted(table_schema(name).items())).encode()).hexdigest()[:12]
+
+
+def _compact(series, dtype):
+    if dtype == CATEGORY:
+        return series.astype(CATEGORY)
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        # Not the numeric column the registry expects (e.g. a changed export); leave it as read
+        return series
+    if np.dtype(dtype).kind == 'i':
+        if series.isna().any():
+            return series.astype('float32')
+        limits = np.iinfo(dtype)
+        if series.min() < limits.min or series.max() > limits.max:
+            return series
+    return series.astype(dtype)
+
+
+def apply_schema(name, df):
+    """Cast the declared columns of a freshly read table to their compact dtypes (in place)"""
+    for column, dtype in table_schema(name).items():
+        if dtype is not None and column in df.columns:
+            df[column] = _compact(df[column], dtype)
+    return df
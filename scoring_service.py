@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+from batch_scoring import (
+    HORIZON_MODELS, OUTPUT_COLUMNS, SCALER_PATH, feature_columns, load_scoring_chain, missing_features, model_feature_columns,
+    score_frame,
+)
+from data_cache import cached
+from video_facts import load_videos, source_paths
+
+# Scoring Service
+#
+# Local HTTP endpoint that keeps the scaler -> selector -> model_24h / model_7d
+# chain in memory. Concurrent requests are queued and coalesced into one
+# predict_proba call per micro-batch: the batcher waits at most the latency
+# window after the first queued request (or until max_batch rows) before scoring.
+# Requests are validated before they are queued: one missing a feature column
+# or carrying non-numeric values gets a 400 listing the problem. Should a batch
+# still fail, its requests are rescored one by one so only the bad one fails.
+#
+#   POST /score    {"columns": [...], "data": [[...], ...]}  ->  {"24h": [...], "7d": [...]}
+#   GET  /metrics  request latency p50 / p99 (ms) and batch size statistics
+#   GET  /health
+#
+#   python scoring_service.py [--port 8765] [--window-ms 5] [--max-batch 4096]
+#
+# When TIKTOK_SCORING_URL is set (e.g. http://127.0.0.1:8765) the dashboard
+# offers a refresh that scores the snapshot live; the result is memoized per
+# snapshot and refresh, so reruns do not call the service again.
+
+SCORING_URL = os.environ.get('TIKTOK_SCORING_URL')
+METRICS_WINDOW = 10000
+# Rows per /score request when a whole snapshot is scored
+REQUEST_ROWS = 5000
+
+
+class MicroBatcher:
+    def __init__(self, chain, window_ms=5, max_batch=4096):
+        self.chain = chain
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.latencies_ms = deque(maxlen=METRICS_WINDOW)
+        self.batch_sizes = deque(maxlen=METRICS_WINDOW)
+        self.requests = 0
+        self.batches = 0
+        threading.Thread(target=self._run, name='micro-batcher', daemon=True).start()
+
+    def submit(self, df):
+        """Queue a feature frame; the future resolves to its per-horizon scores"""
+        future = Future()
+        self._queue.put((df, future))
+        return future
+
+    def score(self, df, timeout=None):
+        start = time.perf_counter()
+        result = self.submit(df).result(timeout)
+        with self._lock:
+            self.latencies_ms.append((time.perf_counter() - start) * 1000)
+            self.requests += 1
+        return result
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.window
+        while rows < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                frames = [df for df, _ in batch]
+                scores = score_frame(self.chain, pd.concat(frames, ignore_index=True))
+            except Exception:
+                # Rescore one request at a time so a bad one does not fail its batch mates
+                for df, future in batch:
+                    try:
+                        future.set_result(score_frame(self.chain, df).reset_index(drop=True))
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+            with self._lock:
+                self.batch_sizes.append(len(scores))
+                self.batches += 1
+            start = 0
+            for df, future in batch:
+                future.set_result(scores.iloc[start:start + len(df)].reset_index(drop=True))
+                start += len(df)
+
+    def metrics(self):
+        with self._lock:
+            latencies = np.array(self.latencies_ms)
+            sizes = np.array(self.batch_sizes)
+            requests, batches = self.requests, self.batches
+        metrics = {'requests': requests, 'batches': batches, 'window_ms': self.window * 1000}
+        if len(latencies):
+            metrics['latency_ms'] = {
+                'p50': round(float(np.percentile(latencies, 50)), 3),
+                'p99': round(float(np.percentile(latencies, 99)), 3),
+                'max': round(float(latencies.max()), 3),
+            }
+        if len(sizes):
+            metrics['batch_size'] = {
+                'mean': round(float(sizes.mean()), 1),
+                'p50': float(np.percentile(sizes, 50)),
+                'p99': float(np.percentile(sizes, 99)),
+                'max': int(sizes.max()),
+            }
+        return metrics
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    batcher = None
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            self._send_json(200, self.batcher.metrics())
+        elif self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'horizons': list(self.batcher.chain['models'])})
+        else:
+            self._send_json(404, {'error': f'unknown path {self.path}'})
+
+    def do_POST(self):
+        if self.path != '/score':
+            self._send_json(404, {'error': f'unknown path {self.path}'})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            df = pd.DataFrame(body['data'], columns=body['columns'])
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': f'invalid request: {e}'})
+            return
+        missing = missing_features(self.batcher.chain, df.columns)
+        if missing:
+            self._send_json(400, {'error': f'missing feature columns: {", ".join(missing)}', 'missing_columns': missing})
+            return
+        try:
+            df = df[feature_columns(self.batcher.chain)].astype('float64')
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {'error': f'non-numeric feature values: {e}'})
+            return
+        try:
+            scores = self.batcher.score(df)
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+        self._send_json(200, {horizon: scores[horizon].tolist() for horizon in scores.columns})
+
+    def log_message(self, format, *args):
+        # Per-request access logs would dominate the latency being measured
+        pass
+
+
+class ScoringServer(ThreadingHTTPServer):
+    # Bursts of concurrent clients are the point; the default backlog of 5 resets them
+    request_queue_size = 256
+
+
+def make_server(host='127.0.0.1', port=8765, window_ms=5, max_batch=4096, horizons=tuple(HORIZON_MODELS)):
+    """HTTP server with the scoring chain loaded once and a micro-batcher attached"""
+    # Micro-batches are small; joblib dispatch would cost more than it saves
+    chain = load_scoring_chain(horizons, n_jobs=1)
+    handler = type('BoundScoringHandler', (ScoringHandler,), {'batcher': MicroBatcher(chain, window_ms, max_batch)})
+    return ScoringServer((host, port), handler)
+
+
+def score_remote(df, url=None, timeout=10, request_rows=REQUEST_ROWS):
+    """Score a feature frame against a running service; returns a DataFrame of per-horizon scores
+
+    Large frames are sent as several requests of at most request_rows rows.
+    """
+    url = (url or SCORING_URL).rstrip('/')
+    # The service picks its feature columns out of whatever numeric columns are sent
+    features = df.select_dtypes(include=['number', 'bool']).astype('float64')
+    parts = []
+    for start in range(0, len(features), request_rows):
+        chunk = features.iloc[start:start + request_rows]
+        payload = json.dumps({'columns': list(chunk.columns), 'data': chunk.to_numpy().tolist()}).encode()
+        request = urllib.request.Request(f'{url}/score', data=payload, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            parts.append(pd.DataFrame(json.loads(response.read()), index=chunk.index))
+    return pd.concat(parts) if parts else pd.DataFrame(index=df.index)
+
+
+def live_top_videos(candidates, horizon, top_k=10, url=None):
+    """Top-K candidates for a horizon scored live by the service"""
+    scores = score_remote(candidates, url)
+    output = [c for c in OUTPUT_COLUMNS if c in candidates.columns]
+    return (
+        candidates[output]
+        .assign(trend_probability=scores[horizon].to_numpy())
+        .nlargest(top_k, 'trend_probability')
+        .reset_index(drop=True)
+    )
+
+
+@cached(lambda horizon, refresh=0, top_k=10: source_paths() + [SCALER_PATH])
+def load_live_top_videos(horizon, refresh=0, top_k=10):
+    """Top-K of the enhanced snapshot scored live, memoized per snapshot and refresh count
+
+    Only id and the model's feature columns are sent to the service.
+    """
+    candidates = load_videos(['id'] + model_feature_columns(), view='enhanced_trend_predictions')
+    return live_top_videos(candidates, horizon, top_k)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve viral-video scores with micro-batching')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--window-ms', type=float, default=5, help='max wait after the first queued request')
+    parser.add_argument('--max-batch', type=int, default=4096, help='rows that close a batch early')
+    args = parser.parse_args()
+    server = make_server(args.host, args.port, args.window_ms, args.max_batch)
+    print(f'Scoring on http://{args.host}:{args.port} (window {args.window_ms} ms)')
+    server.serve_forever()
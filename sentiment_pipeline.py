@@ -0,0 +1,143 @@
+import argparse
+import glob
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from data_cache import cached
+from snapshot_store import SNAPSHOT_DIR
+from video_facts import VIEWS, load_videos, source_paths
+
+# Sentiment Pipeline
+#
+# TextBlob polarity / subjectivity for video texts. Texts are keyed by the sha1
+# of their content, deduplicated, and looked up in a persistent hash -> score
+# cache; only texts never seen before are scored, in parallel worker processes,
+# and appended to the cache as a new part file. Reposts and template captions
+# therefore cost one score per distinct text across all runs. Each run merges
+# its per-video scores into the stage table; in the Emerging Topics tab they
+# take precedence over the exported sentiment columns, and videos no run has
+# covered keep their exported values.
+#
+#   python sentiment_pipeline.py [--source TABLE] [--workers 4]
+
+SENTIMENT_DIR = os.path.join(SNAPSHOT_DIR, 'sentiment')
+VIDEO_SENTIMENT_PATH = os.path.join(SENTIMENT_DIR, 'video_sentiment.parquet')
+SOURCE_TABLE = 'full_df_with_entities'
+TEXT_COLUMN = 'combined_text'
+SCORE_COLUMNS = ['sentiment', 'subjectivity']
+# Polarity bounds of the Neutral category, low < polarity <= high as in the exports
+NEUTRAL_BAND = (-0.1, 0.1)
+
+
+def text_hashes(texts):
+    return np.array([hashlib.sha1(text.encode('utf-8')).hexdigest() for text in texts], dtype=object)
+
+
+def cache_paths():
+    return sorted(glob.glob(os.path.join(SENTIMENT_DIR, 'cache-*.parquet')))
+
+
+def load_score_cache():
+    """Every scored text as a text_hash-indexed frame of sentiment / subjectivity"""
+    paths = cache_paths()
+    if not paths:
+        return pd.DataFrame(columns=SCORE_COLUMNS, index=pd.Index([], name='text_hash'), dtype='float64')
+    parts = pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True)
+    return parts.drop_duplicates('text_hash', keep='last').set_index('text_hash')
+
+
+def _score_texts(texts):
+    from textblob import TextBlob
+    scores = np.empty((len(texts), 2))
+    for row, text in enumerate(texts):
+        sentiment = TextBlob(text).sentiment
+        scores[row] = sentiment.polarity, sentiment.subjectivity
+    return scores
+
+
+def sentiment_category(polarity):
+    low, high = NEUTRAL_BAND
+    return pd.Series(
+        np.select([polarity > high, polarity <= low], ['Positive', 'Negative'], default='Neutral'),
+        index=polarity.index
+    )
+
+
+def score_texts(texts, workers=None, chunk_size=500):
+    """sentiment / subjectivity / sentiment_category for a Series of texts, scoring only unseen ones
+
+    Returns (scores aligned to texts, number of texts that had to be scored).
+    """
+    texts = texts.fillna('').astype(str)
+    hashes = text_hashes(texts)
+    score_cache = load_score_cache()
+    unique = pd.Series(texts.to_numpy(), index=hashes)
+    unique = unique[~unique.index.duplicated()]
+    misses = unique[~unique.index.isin(score_cache.index)]
+    if len(misses):
+        chunks = [misses.iloc[start:start + chunk_size].tolist() for start in range(0, len(misses), chunk_size)]
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                scored = np.vstack(list(pool.map(_score_texts, chunks)))
+        else:
+            scored = np.vstack([_score_texts(chunk) for chunk in chunks])
+        new_scores = pd.DataFrame(scored, columns=SCORE_COLUMNS, index=pd.Index(misses.index, name='text_hash'))
+        os.makedirs(SENTIMENT_DIR, exist_ok=True)
+        path = os.path.join(SENTIMENT_DIR, f'cache-{time.strftime("%Y%m%d%H%M%S")}-{os.getpid()}.parquet')
+        new_scores.reset_index().to_parquet(f'{path}.tmp', index=False)
+        os.replace(f'{path}.tmp', path)
+        score_cache = pd.concat([score_cache, new_scores])
+    scores = score_cache.reindex(hashes).set_axis(texts.index)
+    scores['sentiment_category'] = sentiment_category(scores['sentiment'])
+    return scores, len(misses)
+
+
+def run_sentiment_stage(source=SOURCE_TABLE, workers=None):
+    """Score every video of source and merge it into the per-video sentiment table; returns (videos, newly scored texts)"""
+    videos = load_videos(['id', TEXT_COLUMN], view=source)
+    scores, scored = score_texts(videos[TEXT_COLUMN], workers)
+    result = pd.concat([videos[['id']], scores], axis=1)
+    if os.path.exists(VIDEO_SENTIMENT_PATH):
+        # Videos of other sources keep the scores of earlier runs
+        previous = pd.read_parquet(VIDEO_SENTIMENT_PATH)
+        result = pd.concat([previous[~previous['id'].isin(result['id'])], result], ignore_index=True)
+    os.makedirs(SENTIMENT_DIR, exist_ok=True)
+    result.to_parquet(f'{VIDEO_SENTIMENT_PATH}.tmp', index=False)
+    os.replace(f'{VIDEO_SENTIMENT_PATH}.tmp', VIDEO_SENTIMENT_PATH)
+    return len(videos), scored
+
+
+@cached(lambda columns=None: source_paths(), VIDEO_SENTIMENT_PATH)
+def load_sentiment_table(columns=None):
+    """full_df_with_sentiment_topics with the stage's sentiment columns over the exported ones
+
+    Videos the stage has not scored keep their exported values. columns
+    projects the table (id is always read for the join).
+    """
+    stage_columns = SCORE_COLUMNS + ['sentiment_category']
+    if columns is not None:
+        stage_columns = [c for c in stage_columns if c in columns]
+        columns = list(dict.fromkeys(['id', *columns]))
+    df = load_videos(columns, view='full_df_with_sentiment_topics')
+    if not os.path.exists(VIDEO_SENTIMENT_PATH) or not stage_columns:
+        return df
+    stage = pd.read_parquet(VIDEO_SENTIMENT_PATH, columns=['id'] + stage_columns).set_index('id')
+    joined = df[['id']].join(stage, on='id')
+    df = df.copy()
+    for column in stage_columns:
+        scored = joined[column]
+        df[column] = scored if column not in df.columns else scored.combine_first(df[column].astype(scored.dtype))
+    return df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score video text sentiment with a persistent text-hash cache')
+    parser.add_argument('--source', default=SOURCE_TABLE, choices=list(VIEWS))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    count, scored = run_sentiment_stage(args.source, args.workers)
+    print(f'Scored {count} videos; {scored} distinct texts were not in the cache')
@@ -0,0 +1,200 @@
+import ast
+import os
+import sys
+import threading
+import pandas as pd
+from data_cache import cached
+from schema_registry import apply_schema, schema_fingerprint
+
+# Snapshot Store
+#
+# Every CSV under the snapshot folder is ingested once into a typed Parquet file
+# with the stringified nested fields (country_info, industry_info, trend, ...)
+# decoded into real columns. Sections load the Parquet files directly, so no
+# ast.literal_eval or CSV type inference happens on a Streamlit rerun. Columns
+# are stored with the compact dtypes of the schema registry, and loaders read
+# only the columns they ask for. Loaded frames are memoized in the data cache
+# until the source CSV changes.
+
+SNAPSHOT_DIR = os.environ.get('TIKTOK_SNAPSHOT_DIR', 'back up tiktok')
+COLUMNAR_DIRNAME = 'columnar'
+
+# Dict-valued columns are flattened into <prefix>_id / <prefix>_name / <prefix>_label
+DICT_COLUMNS = {
+    'country_info': 'country',
+    'industry_info': 'industry',
+}
+# List-valued columns are stored as native Parquet lists
+LIST_COLUMNS = ('video_list', 'all_hashtags')
+# Nested trend lists are exploded into a side table keyed by the entity id column
+TREND_KEYS = {
+    'trending_hashtags': 'hashtag_id',
+    'trending_songs': 'songID',
+}
+DATETIME_COLUMNS = ('create_time', 'music_create_time')
+# Parquet metadata key holding the registry fingerprint a table was ingested with
+SCHEMA_KEY = b'tiktok_schema'
+
+# Serializes ingestion between the render thread and background prefetch
+_ingest_lock = threading.Lock()
+
+
+def _literal(value):
+    if isinstance(value, str):
+        return ast.literal_eval(value) if value.strip() else None
+    return value
+
+
+def _decode_dict_column(df, column, prefix):
+    records = df.pop(column).map(_literal)
+    for field, suffix in (('id', 'id'), ('value', 'name'), ('label', 'label')):
+        df[f'{prefix}_{suffix}'] = records.map(lambda d: d.get(field) if isinstance(d, dict) else None)
+
+
+def _explode_trend(df, key):
+    trend = df.pop('trend').map(_literal)
+    trend = trend.map(lambda t: t if isinstance(t, list) else [])
+    lengths = trend.map(len)
+    points = [point for series in trend for point in series]
+    return pd.DataFrame({
+        key: df[key].repeat(lengths.values).values,
+        'date': pd.array([p['date'] for p in points], dtype='int64'),
+        'value': pd.array([p['value'] for p in points], dtype='float32'),
+    })
+
+
+def _normalize_objects(df):
+    # Parquet needs one physical type per column; stringify mixed object columns
+    for column in df.columns:
+        if column in LIST_COLUMNS or df[column].dtype != object:
+            continue
+        values = df[column].dropna()
+        if values.map(type).nunique() > 1:
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+
+
+def columnar_path(name, suffix=''):
+    return os.path.join(SNAPSHOT_DIR, COLUMNAR_DIRNAME, f'{name}{suffix}.parquet')
+
+
+def csv_path(name):
+    return os.path.join(SNAPSHOT_DIR, f'{name}.csv')
+
+
+def read_snapshot(name, columns=None):
+    """Read a snapshot CSV (only the listed columns, if given) with its nested fields decoded"""
+    df = pd.read_csv(csv_path(name), usecols=None if columns is None else (lambda column: column in columns))
+    for column, prefix in DICT_COLUMNS.items():
+        if column in df.columns:
+            _decode_dict_column(df, column, prefix)
+    for column in LIST_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].map(_literal)
+    for column in DATETIME_COLUMNS:
+        if column in df.columns and df[column].dtype == object:
+            df[column] = pd.to_datetime(df[column], errors='coerce')
+    return df
+
+
+def ingest_table(name):
+    """Convert one snapshot CSV into its typed Parquet file(s)"""
+    df = read_snapshot(name)
+    os.makedirs(os.path.dirname(columnar_path(name)), exist_ok=True)
+    if name in TREND_KEYS and 'trend' in df.columns:
+        trend_df = _explode_trend(df, TREND_KEYS[name])
+        trend_df.to_parquet(columnar_path(name, '.trend'), index=False)
+    _normalize_objects(df)
+    apply_schema(name, df)
+    write_columnar(name, df, columnar_path(name))
+    return df
+
+
+def write_columnar(name, df, path):
+    """Write a frame to Parquet tagged with the registry fingerprint of table name"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SCHEMA_KEY] = schema_fingerprint(name).encode()
+    pq.write_table(table.replace_schema_metadata(metadata), f'{path}.tmp')
+    os.replace(f'{path}.tmp', path)
+
+
+def schema_is_current(name, path):
+    """Whether a Parquet file was written with the dtypes the registry now declares for table name"""
+    import pyarrow.parquet as pq
+    return (pq.read_schema(path).metadata or {}).get(SCHEMA_KEY) == schema_fingerprint(name).encode()
+
+
+def snapshot_tables():
+    """Names of the CSVs in the snapshot folder"""
+    return sorted(f[:-4] for f in os.listdir(SNAPSHOT_DIR) if f.endswith('.csv'))
+
+
+def ingest_snapshot(ingest=None):
+    """Ingest every CSV in the snapshot folder with ingest (default ingest_table)"""
+    names = snapshot_tables()
+    for name in names:
+        (ingest or ingest_table)(name)
+    return names
+
+
+def _ensure_ingested(name):
+    with _ingest_lock:
+        if _is_stale(name):
+            ingest_table(name)
+
+
+def _is_stale(name):
+    target = columnar_path(name)
+    if not os.path.exists(target):
+        return True
+    if name in TREND_KEYS and not os.path.exists(columnar_path(name, '.trend')):
+        return True
+    if os.path.getmtime(target) < os.path.getmtime(csv_path(name)):
+        return True
+    # Ingested with other dtypes than the registry now declares
+    return not schema_is_current(name, target)
+
+
+def _projection(name, columns):
+    # Columns a table does not have are skipped; sections test for optional columns
+    if columns is None:
+        return None
+    import pyarrow.parquet as pq
+    available = set(pq.read_schema(columnar_path(name)).names)
+    return [column for column in columns if column in available]
+
+
+@cached(lambda name, columns=None: csv_path(name))
+def load_table(name, columns=None):
+    """Load a snapshot table (only the listed columns, if given), ingesting it first if the Parquet copy is missing or stale"""
+    _ensure_ingested(name)
+    return pd.read_parquet(columnar_path(name), columns=_projection(name, columns))
+
+
+def iter_table_batches(name, columns=None, batch_size=10000):
+    """Stream a snapshot table as DataFrames of at most batch_size rows"""
+    import pyarrow.parquet as pq
+    _ensure_ingested(name)
+    for batch in pq.ParquetFile(columnar_path(name)).iter_batches(batch_size=batch_size, columns=_projection(name, columns)):
+        yield batch.to_pandas()
+
+
+@cached(csv_path)
+def load_trend(name):
+    """Load the exploded trend points (entity key, date, value) of a snapshot table"""
+    _ensure_ingested(name)
+    return pd.read_parquet(columnar_path(name, '.trend'))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        # Modules derive their folders from the environment when first imported
+        os.environ['TIKTOK_SNAPSHOT_DIR'] = sys.argv[1]
+    # The importable module, whose SNAPSHOT_DIR the other modules read, not this script's copy
+    import snapshot_store
+    from leaderboards import ingest_with_leaderboards
+    # Each table's changes are folded into its leaderboards as it is ingested
+    for table in snapshot_store.ingest_snapshot(ingest_with_leaderboards):
+        print(f'Ingested {table}')
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from correlation_engine import RunningMoments
+
+COLUMNS = ['sentiment', 'subjectivity', 'entity_count', 'topic_0']
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(500, len(COLUMNS))) @ rng.normal(size=(len(COLUMNS), len(COLUMNS))) + 10
+    # Rows with a missing value are skipped
+    values[[3, 250, 499], [1, 0, 3]] = np.nan
+    return values
+
+
+def _assert_same(moments, expected):
+    assert moments.count == expected.count
+    np.testing.assert_allclose(moments.mean, expected.mean, rtol=1e-12)
+    np.testing.assert_allclose(moments.comoment, expected.comoment, rtol=1e-10)
+
+
+@pytest.mark.parametrize('splits', [[250], [1, 2, 499], [100, 100, 400], list(range(50, 500, 50))])
+def test_merge_of_split_batches_matches_a_single_pass(values, splits):
+    single = RunningMoments.from_array(COLUMNS, values)
+    merged = RunningMoments(COLUMNS)
+    for batch in np.split(values, splits):
+        merged.merge(RunningMoments.from_array(COLUMNS, batch))
+    _assert_same(merged, single)
+
+
+def test_update_order_does_not_matter(values):
+    forward, backward = RunningMoments(COLUMNS), RunningMoments(COLUMNS)
+    batches = np.array_split(values, 7)
+    for batch in batches:
+        forward.update(batch)
+    for batch in reversed(batches):
+        backward.update(batch)
+    _assert_same(forward, backward)
+
+
+def test_statistics_match_numpy(values):
+    complete = values[~np.isnan(values).any(axis=1)]
+    moments = RunningMoments(COLUMNS)
+    for batch in np.array_split(values, 4):
+        moments.update(batch)
+    np.testing.assert_allclose(moments.covariance().to_numpy(), np.cov(complete, rowvar=False), rtol=1e-10)
+    np.testing.assert_allclose(moments.correlation().to_numpy(), np.corrcoef(complete, rowvar=False), rtol=1e-10)
+
+
+def test_merge_rejects_other_columns():
+    with pytest.raises(ValueError):
+        RunningMoments(COLUMNS).merge(RunningMoments(COLUMNS[::-1]))
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+import leaderboards
+import snapshot_store
+
+NAME = 'trending_creators'
+
+
+def _creators(ids, rng):
+    # Distinct values, so every board has a single correct order
+    return pd.DataFrame({
+        'user_id': ids,
+        'nick_name': [f'creator {i}' for i in ids],
+        'follower_cnt': rng.permutation(len(ids)) * 7 + 1,
+        'liked_cnt': rng.permutation(len(ids)) * 11 + 2,
+    })
+
+
+@pytest.fixture
+def snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_store, 'SNAPSHOT_DIR', str(tmp_path))
+    monkeypatch.setattr(leaderboards, 'LEADERBOARD_DIR', str(tmp_path / 'leaderboards'))
+    updates = []
+    update = leaderboards.update_leaderboards
+
+    def spy(name, rows=None, removed_keys=(), df=None):
+        updates.append((rows, list(removed_keys)))
+        return update(name, rows, removed_keys, df)
+
+    monkeypatch.setattr(leaderboards, 'update_leaderboards', spy)
+    rng = np.random.default_rng(0)
+    before = _creators(np.arange(200), rng)
+    before.to_csv(tmp_path / f'{NAME}.csv', index=False)
+    leaderboards.ingest_with_leaderboards(NAME)
+    # The next snapshot drops some leaders, demotes and promotes others and adds newcomers
+    after = before[~before['user_id'].isin(before.nlargest(3, 'follower_cnt')['user_id'])].copy()
+    after.loc[after['liked_cnt'].nlargest(4).index, 'liked_cnt'] = 0
+    after.loc[after.index[:5], 'follower_cnt'] += 5000
+    after = pd.concat([after, _creators(np.arange(200, 210), rng).assign(liked_cnt=lambda df: df['liked_cnt'] + 3000)])
+    after.to_csv(tmp_path / f'{NAME}.csv', index=False)
+    leaderboards.ingest_with_leaderboards(NAME)
+    return before, after, updates
+
+
+def _boards():
+    return {metric: leaderboards.load_leaderboard(NAME, metric) for metric in leaderboards.BOARDS[NAME]['metrics']}
+
+
+def test_ingest_merges_only_changed_rows(snapshot):
+    before, after, updates = snapshot
+    assert len(updates) == 1
+    rows, removed = updates[0]
+    assert sorted(removed) == sorted(before.nlargest(3, 'follower_cnt')['user_id'])
+    # 4 demoted, 5 promoted (disjoint or not) and 10 new rows; nothing else
+    assert 10 < len(rows) <= 19
+    assert set(range(200, 210)) <= set(rows['user_id'])
+
+
+def test_incremental_update_matches_full_rebuild(snapshot):
+    _, after, _ = snapshot
+    incremental = _boards()
+    leaderboards.build_leaderboards(NAME)
+    rebuilt = _boards()
+    for metric, board in incremental.items():
+        pd.testing.assert_frame_equal(board, rebuilt[metric])
+        expected = after.nlargest(leaderboards.TOP_K, metric)['nick_name'].tolist()
+        assert board['nick_name'].tolist() == expected, metric
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+import sentiment_pipeline
+import snapshot_store
+import video_facts
+
+
+def test_category_band_matches_exports():
+    # The exports label -0.1 Negative and 0.1 Neutral
+    polarity = pd.Series([-0.3, -0.1, -0.09, 0.0, 0.1, 0.11])
+    assert sentiment_pipeline.sentiment_category(polarity).tolist() == [
+        'Negative', 'Negative', 'Neutral', 'Neutral', 'Neutral', 'Positive',
+    ]
+
+
+@pytest.fixture
+def snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_store, 'SNAPSHOT_DIR', str(tmp_path))
+    monkeypatch.setattr(video_facts, 'FACT_DIR', str(tmp_path / 'facts'))
+    monkeypatch.setattr(sentiment_pipeline, 'SENTIMENT_DIR', str(tmp_path / 'sentiment'))
+    monkeypatch.setattr(sentiment_pipeline, 'VIDEO_SENTIMENT_PATH', str(tmp_path / 'sentiment' / 'video_sentiment.parquet'))
+    texts = {1: 'great video', 2: 'awful video', 3: 'a video'}
+    pd.DataFrame({
+        'id': [1, 2, 3], 'combined_text': list(texts.values()),
+        'sentiment': [0.1, -0.1, 0.0], 'sentiment_category': ['Neutral', 'Negative', 'Neutral'],
+    }).to_csv(tmp_path / 'full_df_with_sentiment_topics.csv', index=False)
+    pd.DataFrame({'id': [1, 2], 'combined_text': [texts[1], texts[2]]}).to_csv(
+        tmp_path / 'full_df_with_entities.csv', index=False
+    )
+    # Every text is in the score cache, so no text is scored
+    (tmp_path / 'sentiment').mkdir()
+    pd.DataFrame({
+        'text_hash': sentiment_pipeline.text_hashes(list(texts.values())),
+        'sentiment': [0.8, -0.6, 0.05], 'subjectivity': [0.5, 0.5, 0.5],
+    }).to_parquet(tmp_path / 'sentiment' / 'cache-0.parquet', index=False)
+
+
+def _sentiment():
+    df = sentiment_pipeline.load_sentiment_table(columns=['sentiment', 'sentiment_category'])
+    return df.set_index('id')[['sentiment', 'sentiment_category']].astype(object).to_dict('index')
+
+
+def test_unscored_videos_keep_exported_sentiment(snapshot):
+    assert sentiment_pipeline.run_sentiment_stage('full_df_with_entities', workers=1) == (2, 0)
+    assert _sentiment() == {
+        1: {'sentiment': 0.8, 'sentiment_category': 'Positive'},
+        2: {'sentiment': -0.6, 'sentiment_category': 'Negative'},
+        3: {'sentiment': 0.0, 'sentiment_category': 'Neutral'},
+    }
+
+
+def test_stage_runs_merge_into_the_stage_table(snapshot):
+    sentiment_pipeline.run_sentiment_stage('full_df_with_sentiment_topics', workers=1)
+    sentiment_pipeline.run_sentiment_stage('full_df_with_entities', workers=1)
+    stage = pd.read_parquet(sentiment_pipeline.VIDEO_SENTIMENT_PATH)
+    assert sorted(stage['id']) == [1, 2, 3]
+    assert _sentiment()[3] == {'sentiment': 0.05, 'sentiment_category': 'Neutral'}
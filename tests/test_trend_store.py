@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+from trend_store import TrendStore
+
+DAY = 86400
+
+
+@pytest.fixture
+def store():
+    rng = np.random.default_rng(0)
+    keys, timestamps, values = [], [], []
+    # Ragged series with irregular spacing, plus a constant and a single-point series
+    for key, length in [('a', 7), ('b', 3), ('c', 12), ('flat', 4), ('single', 1)]:
+        days = np.sort(rng.choice(60, size=length, replace=False))
+        keys += [key] * length
+        timestamps += list(1_700_000_000 + days * DAY)
+        values += [5.0] * length if key == 'flat' else list(rng.normal(50, 20, size=length).round(2))
+    # Points in any order
+    order = rng.permutation(len(keys))
+    return TrendStore.from_points(np.array(keys)[order], np.array(timestamps)[order], np.array(values)[order])
+
+
+def test_regress_matches_linregress(store):
+    stats = pytest.importorskip('scipy.stats')
+    fits = store.regress(time_unit=DAY)
+    for key in ['a', 'b', 'c']:
+        timestamps, values = store.series(key)
+        expected = stats.linregress((timestamps - timestamps.min()) / DAY, values.astype(np.float64))
+        assert fits.loc[key, 'slope'] == pytest.approx(expected.slope, abs=1e-9)
+        assert fits.loc[key, 'intercept'] == pytest.approx(expected.intercept, abs=1e-6)
+        assert fits.loc[key, 'r'] == pytest.approx(expected.rvalue, abs=1e-9)
+    # A flat series has no correlation to speak of; regress reports r = 0
+    assert fits.loc['flat'].tolist() == [0.0, 5.0, 0.0]
+    assert fits.loc['single'].isna().all()
+
+
+def test_top_n_matches_a_full_sort(store):
+    means = pd.Series(store.means(), index=store.keys).sort_values(ascending=False)
+    for n in range(len(store) + 2):
+        assert list(store.top_n(n)) == list(means.index[:n])
+    maxes = pd.Series(store.maxes(), index=store.keys).sort_values(ascending=False)
+    assert list(store.top_n(3, by='max')) == list(maxes.index[:3])
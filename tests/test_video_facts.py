@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+import snapshot_store
+import video_facts
+
+
+def _export(ids, **columns):
+    return pd.DataFrame({'id': ids, 'title': [f'video {i}' for i in ids], **columns})
+
+
+@pytest.fixture
+def snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_store, 'SNAPSHOT_DIR', str(tmp_path))
+    monkeypatch.setattr(video_facts, 'FACT_DIR', str(tmp_path / 'facts'))
+    # Every export lists a different set of ids
+    exports = {
+        'trending_videos': _export([1, 2, 3, 4, 5]),
+        'enhanced_trend_predictions': _export([3, 1, 2], word_count=[3, 1, 2]),
+        'full_df_with_entities': _export([2, 4], word_count=[2, 4], entity_count=[20, 40]),
+        'full_df_with_sentiment_topics': _export([5], word_count=[5], dominant_topic=[1]),
+        'predicted_viral_videos_next_24h': _export([1, 4], predicted_24h=[1, 0]),
+    }
+    for name, df in exports.items():
+        df.to_csv(tmp_path / f'{name}.csv', index=False)
+    return exports
+
+
+def test_views_return_exactly_their_exports_rows(snapshot):
+    for name, df in snapshot.items():
+        view = video_facts.load_videos(['id', 'title'], view=name)
+        assert view['id'].tolist() == df['id'].tolist(), name
+
+
+def test_views_join_columns_from_side_tables(snapshot):
+    view = video_facts.load_videos(['id', 'word_count', 'entity_count'], view='full_df_with_entities')
+    assert view['id'].tolist() == [2, 4]
+    assert view['word_count'].tolist() == [2, 4]
+    assert view['entity_count'].tolist() == [20, 40]
+
+
+def test_batches_match_the_view(snapshot):
+    batches = list(video_facts.iter_video_batches(['id', 'word_count'], view='enhanced_trend_predictions', batch_size=2))
+    assert pd.concat(batches)['id'].tolist() == [3, 1, 2]
+
+
+def test_unviewed_load_covers_every_video(snapshot):
+    assert sorted(video_facts.load_videos(['id'])['id']) == [1, 2, 3, 4, 5]
+
+
+def test_with_video_columns_joins_only_the_frames_ids(snapshot):
+    top = pd.DataFrame({'id': [4, 2], 'trend_probability': [0.9, 0.8]})
+    df = video_facts.with_video_columns(top, ['id', 'title', 'entity_count'])
+    assert df.columns.tolist() == ['id', 'title', 'entity_count', 'trend_probability']
+    assert df['title'].tolist() == ['video 4', 'video 2']
+    assert df['entity_count'].tolist() == [40, 20]
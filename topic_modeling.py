@@ -1,28 +1,79 @@
 import streamlit as st
 import pandas as pd
-from gensim import corpora, models
+from correlation_engine import load_correlation_matrix
+from data_cache import cached
+from ner_pipeline import load_entities, part_paths
+from plot_utils import scalable_scatter
+from sentiment_pipeline import load_sentiment_table
+from topic_pipeline import LDA_DICTIONARY_PATH, LDA_MODEL_PATH, load_topic_assignments
+from video_facts import load_videos, source_paths
+
+# Sentiment section inputs; views is optional and only plotted when present
+SENTIMENT_COLUMNS = ['sentiment', 'sentiment_category', 'views']
+
+@cached(LDA_MODEL_PATH, LDA_DICTIONARY_PATH)
+def load_topic_table(num_words=5):
+    from gensim import corpora, models
+    # Load LDA model and dictionary
+    lda_model = models.LdaModel.load(LDA_MODEL_PATH)
+    dictionary = corpora.Dictionary.load(LDA_DICTIONARY_PATH)
+    # Show topics
+    topics = lda_model.print_topics(num_words=num_words)
+    # Show topics as a table for better readability
+    topic_words = []
+    for topic_num, topic_words_str in topics:
+        # Parse the topic_words_str to extract words only
+        words = [w.split('*')[1].replace('"','').strip() for w in topic_words_str.split('+')]
+        topic_words.append([topic_num + 1] + words)  
+    # Create DataFrame for table
+    max_words = max(len(row)-1 for row in topic_words)
+    columns = ['Topic'] + [f'Word {i+1}' for i in range(max_words)]
+    topic_df = pd.DataFrame(topic_words, columns=columns)
+    topic_df.index = topic_df.index + 1
+    return topic_df
+
+@cached(lambda: source_paths(), lambda: part_paths())
+def load_entity_summary():
+    # Aggregate the entity table precomputed by ner_pipeline.py
+    video_ids = load_videos(['id'], view='full_df_with_entities')['id']
+    entities = load_entities()
+    entities = entities[entities['video_id'].isin(video_ids)]
+    if entities.empty:
+        raise ValueError('no extracted entities found; run `python ner_pipeline.py` first')
+    # Top 10 entities
+    entity_df = (
+        entities['entity_text'].str.lower().value_counts().head(10)
+        .rename_axis('Entity').reset_index(name='Count')
+    )
+    type_counts = entities['label'].value_counts()
+    # Entity examples: first five distinct texts per type, in order of appearance
+    examples = entities.drop_duplicates(['label', 'entity_text']).groupby('label', sort=False).head(5)
+    example_data = [[etype] + texts for etype, texts in examples.groupby('label', sort=False)['entity_text'].agg(list).items()]
+    max_examples = max(len(row) for row in example_data)
+    columns = ["Entity Type"] + [f"Example {i}" for i in range(1, max_examples)]
+    example_df = pd.DataFrame(example_data, columns=columns)
+    example_df.index = example_df.index + 1 
+    return entity_df, type_counts, example_df
+
+def prefetch():
+    load_topic_table()
+    load_topic_assignments()
+    load_correlation_matrix()
+    load_sentiment_table(columns=SENTIMENT_COLUMNS)
+    load_entity_summary()
 
 def show_topic_modeling():
     st.markdown('<h2 style="margin-bottom: 0.5em;">Emerging Topics (NLP)</h2>', unsafe_allow_html=True)
     try:
-        # Load LDA model and dictionary
-        lda_model = models.LdaModel.load("back up tiktok/lda_model.gensim")
-        dictionary = corpora.Dictionary.load("back up tiktok/lda_dictionary.dict")
-        # Show topics
-        topics = lda_model.print_topics(num_words=5)
-        # Show topics as a table for better readability
-        topic_words = []
-        for topic_num, topic_words_str in topics:
-            # Parse the topic_words_str to extract words only
-            words = [w.split('*')[1].replace('"','').strip() for w in topic_words_str.split('+')]
-            topic_words.append([topic_num + 1] + words)  
-        # Create DataFrame for table
-        max_words = max(len(row)-1 for row in topic_words)
-        columns = ['Topic'] + [f'Word {i+1}' for i in range(max_words)]
-        topic_df = pd.DataFrame(topic_words, columns=columns)
-        topic_df.index = topic_df.index + 1
+        topic_df = load_topic_table()
         st.markdown('### Topics Table (Top Words per Topic)')
         st.dataframe(topic_df, use_container_width=True)
+        # Per-video assignments written by topic_pipeline.py
+        assignments = load_topic_assignments()
+        if not assignments.empty:
+            st.markdown('### Videos per Dominant Topic')
+            topic_counts = (assignments['dominant_topic'] + 1).value_counts().sort_index()
+            st.bar_chart(topic_counts.rename_axis('Topic').rename('Videos'))
 
     except Exception as e:
         st.error(f'Could not load or display topic modeling results: {e}')
@@ -30,15 +81,14 @@ def show_topic_modeling():
     st.markdown('---')
     st.markdown('### Sentiment Analysis of Video Descriptions')
     try:
-        df = pd.read_csv("back up tiktok/full_df_with_sentiment_topics.csv")
+        df = load_sentiment_table(columns=SENTIMENT_COLUMNS)
         if 'sentiment_category' in df.columns:
             sentiment_counts = df['sentiment_category'].value_counts().reindex(['Negative', 'Neutral', 'Positive']).fillna(0)
             st.markdown('#### Sentiment Distribution')
             st.bar_chart(sentiment_counts)
             if 'views' in df.columns:
-                import plotly.express as px
                 st.markdown('#### Sentiment vs. Views')
-                fig = px.scatter(df, x='sentiment', y='views', color='sentiment_category',
+                fig = scalable_scatter(df, x='sentiment', y='views', color='sentiment_category',
                                 labels={'sentiment': 'Sentiment Score', 'views': 'Views'},
                                 title='Sentiment vs. Views',
                                 color_discrete_map={'Negative':'#EF553B','Neutral':'#636EFA','Positive':'#00CC96'})
@@ -47,27 +97,28 @@ def show_topic_modeling():
     except Exception as e:
         st.warning(f'Could not load or display sentiment analysis results: {e}')
     
+    st.markdown('---')
+    st.markdown('### Topic, Sentiment and Entity Correlations')
+    try:
+        import plotly.express as px
+        matrix = load_correlation_matrix()
+        fig_corr = px.imshow(
+            matrix.round(2),
+            text_auto=True,
+            color_continuous_scale='RdBu_r',
+            zmin=-1,
+            zmax=1,
+            aspect='auto'
+        )
+        fig_corr.update_layout(margin=dict(l=60, r=30, t=30, b=40))
+        st.plotly_chart(fig_corr, use_container_width=True)
+    except Exception as e:
+        st.warning(f'Could not load or display the correlation matrix: {e}')
+
     st.markdown('---')
     st.markdown('### Named Entity Recognition (NER)')
     try:
-        df_entities = pd.read_csv("back up tiktok/full_df_with_entities.csv")
-        from collections import defaultdict
-        import spacy
-        nlp = spacy.load('en_core_web_sm')
-        entity_counter = defaultdict(int)
-        entity_types = defaultdict(int)
-        entity_examples = defaultdict(list)
-        for text in df_entities['title'].fillna(''):
-            doc = nlp(str(text))
-            for ent in doc.ents:
-                entity_counter[ent.text.lower()] += 1
-                entity_types[ent.label_] += 1
-                if ent.text not in entity_examples[ent.label_]:
-                    entity_examples[ent.label_].append(ent.text)
-        # Display top 10 entities
-        top_entities = sorted(entity_counter.items(), key=lambda x: x[1], reverse=True)[:10]
-        entity_df = pd.DataFrame(top_entities, columns=['Entity', 'Count'])
-      
+        entity_df, type_counts, example_df = load_entity_summary()
         col1, col2 = st.columns(2)
         with col1:
             st.markdown('#### Most Frequent Entities (Top 10)')
@@ -75,16 +126,8 @@ def show_topic_modeling():
         with col2:
             st.markdown('#### Entity Type Distribution')
             # Display entity type distribution
-            type_counts = pd.Series(entity_types).sort_values(ascending=False)
             st.bar_chart(type_counts, height=400)  
         # Display entity examples 
-        example_data = []
-        for etype, examples in entity_examples.items():
-            example_data.append([etype] + examples[:5])
-        max_examples = max(len(row) for row in example_data)
-        columns = ["Entity Type"] + [f"Example {i}" for i in range(1, max_examples)]
-        example_df = pd.DataFrame(example_data, columns=columns)
-        example_df.index = example_df.index + 1 
         st.markdown('#### Entity Examples')
         st.dataframe(example_df, use_container_width=True)
     except Exception as e:
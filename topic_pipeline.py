@@ -0,0 +1,185 @@
+import argparse
+import glob
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+from data_cache import cached, content_hash
+from snapshot_store import SNAPSHOT_DIR
+from video_facts import VIEWS, iter_video_batches
+
+# Topic Pipeline
+#
+# Assigns LDA topic distributions to video descriptions that have none yet, in
+# streamed batches against the saved lda_model.gensim / lda_dictionary.dict.
+# Assignments are written as part files of id, dominant_topic and topic_0..k-1
+# (the layout of full_df_with_sentiment_topics / trend_correlation_matrix),
+# tagged with the hash of the model that produced them, so a new model only
+# invalidates its predecessor's rows. The model itself can be updated online
+# with new documents or retrained with LdaMulticore; both read the corpus as a
+# stream of batches, so memory is bounded by the batch size.
+#
+#   python topic_pipeline.py infer [--source TABLE]
+#   python topic_pipeline.py update [--source TABLE]
+#   python topic_pipeline.py retrain [--source TABLE] [--num-topics 5] [--workers 3]
+
+LDA_MODEL_PATH = os.path.join(SNAPSHOT_DIR, 'lda_model.gensim')
+LDA_DICTIONARY_PATH = os.path.join(SNAPSHOT_DIR, 'lda_dictionary.dict')
+TOPIC_DIR = os.path.join(SNAPSHOT_DIR, 'topics')
+SOURCE_TABLE = 'full_df_with_sentiment_topics'
+TEXT_COLUMN = 'combined_text'
+TOKEN_PATTERN = re.compile(r'[a-z]+')
+
+
+def tokenize(text):
+    """Lowercase alphabetic tokens without stopwords, as the dictionary was built"""
+    from gensim.parsing.preprocessing import STOPWORDS
+    return [token for token in TOKEN_PATTERN.findall(str(text).lower()) if token not in STOPWORDS]
+
+
+def iter_documents(source=SOURCE_TABLE, batch_size=2000):
+    """Yield (ids, token lists) per batch of the source table"""
+    for batch in iter_video_batches(['id', TEXT_COLUMN], view=source, batch_size=batch_size):
+        yield batch['id'].to_numpy(), [tokenize(text) for text in batch[TEXT_COLUMN].fillna('')]
+
+
+class StreamedCorpus:
+    """Bag-of-words corpus re-read from the snapshot on every pass"""
+
+    def __init__(self, dictionary, source=SOURCE_TABLE, batch_size=2000):
+        self.dictionary = dictionary
+        self.source = source
+        self.batch_size = batch_size
+
+    def __iter__(self):
+        for _, documents in iter_documents(self.source, self.batch_size):
+            for tokens in documents:
+                yield self.dictionary.doc2bow(tokens)
+
+
+def load_model():
+    from gensim import corpora, models
+    return models.LdaModel.load(LDA_MODEL_PATH), corpora.Dictionary.load(LDA_DICTIONARY_PATH)
+
+
+def model_version():
+    return content_hash(LDA_MODEL_PATH)[:12]
+
+
+def part_paths(version='*'):
+    return sorted(glob.glob(os.path.join(TOPIC_DIR, f'topics-{version}-*.parquet')))
+
+
+def topic_columns(num_topics):
+    return [f'topic_{i}' for i in range(num_topics)]
+
+
+@cached(LDA_MODEL_PATH, lambda: part_paths())
+def load_topic_assignments():
+    """Per-video dominant_topic and topic_* columns from the current model"""
+    paths = part_paths(model_version())
+    if not paths:
+        return pd.DataFrame(columns=['id', 'dominant_topic'])
+    return pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True).drop_duplicates('id', keep='last')
+
+
+def document_topics(lda_model, dictionary, documents):
+    """Dense (documents x topics) matrix of topic probabilities"""
+    corpus = [dictionary.doc2bow(tokens) for tokens in documents]
+    dense = np.zeros((len(corpus), lda_model.num_topics), dtype='float32')
+    for row, topics in enumerate(lda_model.get_document_topics(corpus, minimum_probability=0.0)):
+        for topic, probability in topics:
+            dense[row, topic] = probability
+    return dense
+
+
+def _write_atomic(df, path):
+    tmp_path = f'{path}.tmp'
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def infer_topics(source=SOURCE_TABLE, batch_size=2000):
+    """Assign topics to every video of source without an assignment from the current model"""
+    lda_model, dictionary = load_model()
+    version = model_version()
+    done = load_topic_assignments()['id'].to_numpy()
+    os.makedirs(TOPIC_DIR, exist_ok=True)
+    run_tag = time.strftime('%Y%m%d%H%M%S')
+    count = 0
+    for part, (ids, documents) in enumerate(iter_documents(source, batch_size)):
+        pending = ~np.isin(ids, done)
+        if not pending.any():
+            continue
+        dense = document_topics(lda_model, dictionary, [doc for doc, keep in zip(documents, pending) if keep])
+        assignments = pd.DataFrame(dense, columns=topic_columns(lda_model.num_topics))
+        assignments.insert(0, 'dominant_topic', dense.argmax(axis=1))
+        assignments.insert(0, 'id', ids[pending])
+        _write_atomic(assignments, os.path.join(TOPIC_DIR, f'topics-{version}-{run_tag}-{part:05d}.parquet'))
+        count += len(assignments)
+    # Assignments of replaced models are never read again
+    for path in set(part_paths()) - set(part_paths(version)):
+        os.remove(path)
+    return count
+
+
+def _save_model(lda_model, dictionary):
+    # gensim writes several files per model; rename the sidecars first and the
+    # main file last so readers never load a half-written model
+    tmp_path = f'{LDA_MODEL_PATH}.tmp'
+    lda_model.save(tmp_path)
+    dictionary.save(f'{LDA_DICTIONARY_PATH}.tmp')
+    for sidecar in glob.glob(f'{tmp_path}.*'):
+        os.replace(sidecar, LDA_MODEL_PATH + sidecar[len(tmp_path):])
+    os.replace(f'{LDA_DICTIONARY_PATH}.tmp', LDA_DICTIONARY_PATH)
+    os.replace(tmp_path, LDA_MODEL_PATH)
+
+
+def update_model(source=SOURCE_TABLE, batch_size=2000):
+    """Online update of the saved model with the documents of source (vocabulary unchanged)"""
+    lda_model, dictionary = load_model()
+    lda_model.update(StreamedCorpus(dictionary, source, batch_size), chunksize=batch_size)
+    _save_model(lda_model, dictionary)
+    return lda_model
+
+
+def retrain_model(source=SOURCE_TABLE, num_topics=None, workers=None, passes=10, batch_size=2000,
+                  no_below=2, no_above=0.5):
+    """Retrain from scratch with LdaMulticore over a streamed corpus and a rebuilt dictionary"""
+    from gensim import corpora, models
+    if num_topics is None:
+        num_topics = load_model()[0].num_topics
+    dictionary = corpora.Dictionary()
+    for _, documents in iter_documents(source, batch_size):
+        dictionary.add_documents(documents)
+    dictionary.filter_extremes(no_below=no_below, no_above=no_above, keep_n=None)
+    lda_model = models.LdaMulticore(
+        StreamedCorpus(dictionary, source, batch_size),
+        id2word=dictionary,
+        num_topics=num_topics,
+        workers=workers or max(1, (os.cpu_count() or 2) - 1),
+        chunksize=batch_size,
+        passes=passes,
+        random_state=42,
+    )
+    _save_model(lda_model, dictionary)
+    return lda_model
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Assign LDA topics to videos and refresh the topic model')
+    parser.add_argument('command', choices=['infer', 'update', 'retrain'])
+    parser.add_argument('--source', default=SOURCE_TABLE, choices=list(VIEWS))
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--num-topics', type=int)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--passes', type=int, default=10)
+    args = parser.parse_args()
+    if args.command == 'update':
+        update_model(args.source, args.batch_size)
+    elif args.command == 'retrain':
+        retrain_model(args.source, args.num_topics, args.workers, args.passes, args.batch_size)
+    # A changed model invalidates earlier assignments, so infer after every refresh
+    count = infer_topics(args.source, args.batch_size)
+    print(f'Assigned topics to {count} videos')
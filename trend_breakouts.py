@@ -0,0 +1,75 @@
+import streamlit as st
+import pandas as pd
+from breakout_detection import BREAKOUT_SETTINGS, Z_THRESHOLD, load_breakouts
+from partition_store import load_scoped, load_scoped_trend_store
+
+# table -> (key column, name column, label)
+BREAKOUT_VIEWS = {
+    'trending_hashtags': ('hashtag_id', 'hashtag_name', 'Hashtag'),
+    'trending_songs': ('songID', 'title', 'Song'),
+}
+
+def prefetch():
+    for name, (key, name_column, _) in BREAKOUT_VIEWS.items():
+        load_scoped(name, columns=[key, name_column])
+        load_breakouts(name)
+
+def show_breakout_table(name):
+    key, name_column, label = BREAKOUT_VIEWS[name]
+    breakouts = load_breakouts(name)
+    names = load_scoped(name, columns=[key, name_column]).drop_duplicates(key).set_index(key)[name_column]
+    flagged = breakouts[breakouts['is_breakout']]
+    st.markdown(f'**New {label} Breakouts** (as of {breakouts.attrs["as_of"]:%Y-%m-%d})')
+    col1, col2 = st.columns(2)
+    col1.metric(f'{label}s scanned', len(breakouts))
+    col2.metric('Newly breaking out', len(flagged))
+    if flagged.empty:
+        st.info(f'No {label.lower()} crossed a z-score of {Z_THRESHOLD:g} for the first time; strongest momentum shown instead.')
+        flagged = breakouts
+    top = flagged.head(10)
+    table = pd.DataFrame({
+        label: names.reindex(top.index).to_numpy(),
+        'Latest': top['latest_value'].to_numpy(),
+        'Baseline': top['baseline_mean'].round(3).to_numpy(),
+        'Z-score': top['zscore'].round(2).to_numpy(),
+        'Acceleration': top['acceleration'].round(3).to_numpy(),
+        'Breakout Score': top['breakout_score'].round(2).to_numpy(),
+    })
+    table.index = table.index + 1
+    table.index.name = 'No.'
+    st.dataframe(table)
+    # Recent history of the five strongest breakouts
+    period, window = BREAKOUT_SETTINGS[name]
+    history = load_scoped_trend_store(name).to_frame(top.index[:5], key_name=key)
+    history = history[history['date'] >= breakouts.attrs['as_of'] - pd.Timedelta(seconds=period * window * 2)]
+    history[label] = names.reindex(history[key]).to_numpy()
+    import plotly.express as px
+    fig = px.line(
+        history,
+        x='date',
+        y='value',
+        color=label,
+        markers=True,
+        title=f'Recent Trend of Top {label} Breakouts'
+    )
+    fig.update_layout(
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font_color='#232526',
+        xaxis_title='Date',
+        yaxis_title='Trend Value',
+        margin=dict(l=60, r=30, t=60, b=40)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+def show_trend_breakouts():
+    st.markdown('<div style=" padding: 18px 24px; border-radius: 12px; margin-bottom: 1.5em; box-shadow: 0 2px 8px rgba(0,0,0,0.04); display: inline-block;">\
+        <h2 style="margin: 0; color: #232526; font-weight: 700; letter-spacing: 0.5px;">Breakouts</h2>\
+    </div>', unsafe_allow_html=True)
+    st.caption(f'Entities whose latest trend value is at least {Z_THRESHOLD:g} standard deviations above their recent baseline, '
+               'rising, and not flagged in the preceding periods.')
+    for name in BREAKOUT_VIEWS:
+        try:
+            show_breakout_table(name)
+        except Exception as e:
+            st.error(f'Could not detect breakouts in {name}.csv: {e}')
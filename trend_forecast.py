@@ -1,31 +1,40 @@
 import streamlit as st
-import pandas as pd
-import pickle
 import os
-import plotly.graph_objects as go
+from batch_scoring import load_top_videos
+from forecast_materializer import HORIZONS, PROPHET_PATH, load_forecast
+from hashtag_matcher import load_top_hashtags
+from scoring_service import SCORING_URL, load_live_top_videos
+from snapshot_store import csv_path
+from video_facts import with_video_columns
 
 # Trend Forecast Section
 
+# Columns shown in the top viral videos table
+TOP_VIDEO_COLUMNS = ['id', 'desc', 'author_user_id', 'music_author', 'music_id']
+
+def prefetch():
+    load_forecast(horizon=30)
+    for horizon in ('24h', '7d'):
+        load_top_hashtags(horizon)
+        load_top_videos(horizon, columns=TOP_VIDEO_COLUMNS)
+
 def show_trend_forecast():
+    import plotly.graph_objects as go
     st.markdown('<h2 style="margin-bottom: 0.5em;">Trend Forecast</h2>', unsafe_allow_html=True)
     
     # --- Prophet Time Series Forecast (if model and data available) ---
-    prophet_path = 'back up tiktok/prophet_model.pkl'
-    data_path = 'back up tiktok/enhanced_trend_predictions.csv'
+    data_path = csv_path('enhanced_trend_predictions')
     
-    if os.path.exists(prophet_path) and os.path.exists(data_path):
+    if os.path.exists(PROPHET_PATH) and os.path.exists(data_path):
         try:
-            with open(prophet_path, 'rb') as f:
-                prophet_model = pickle.load(f)
-            
-            df = pd.read_csv(data_path)
-            df['create_time'] = pd.to_datetime(df['create_time'])
-            ts_data = df.groupby(df['create_time'].dt.date)['is_trending'].sum().reset_index()
-            ts_data.columns = ['ds', 'y']
-            
-            # Forecast next 30 days
-            future = prophet_model.make_future_dataframe(periods=30)
-            forecast = prophet_model.predict(future)
+            horizon = st.selectbox(
+                'Forecast horizon (days):',
+                HORIZONS,
+                index=HORIZONS.index(30),
+                key='forecast_horizon'
+            )
+            # Materialized forecast (Prophet only reruns when the model or data changes)
+            ts_data, forecast = load_forecast(horizon=horizon)
             
             # Create the figure with white background
             fig = go.Figure()
@@ -62,7 +71,7 @@ def show_trend_forecast():
             # Update layout
             fig.update_layout(
                 title={
-                    'text': 'Trending Content Forecast for Next 30 Days',
+                    'text': f'Trending Content Forecast for Next {horizon} Days',
                     'y': 0.95,
                     'x': 0.5,
                     'xanchor': 'center',
@@ -118,27 +127,38 @@ def show_trend_forecast():
         key='trend_time_range'
     )
     if option == 'Next 24 Hours':
-        hashtag_csv = 'back up tiktok/top10_hashtags_24h.csv'
-        video_csv = 'back up tiktok/predicted_viral_videos_next_24h.csv'
+        video_horizon = '24h'
         subtitle_hashtag = 'Top 10 Hashtags'
         subtitle_video = 'Top 10 Viral Videos'
     else:
-        hashtag_csv = 'back up tiktok/top10_hashtags_7d.csv'
-        video_csv = 'back up tiktok/predicted_viral_videos_next_7d.csv'
+        video_horizon = '7d'
         subtitle_hashtag = 'Top 10 Hashtags'
         subtitle_video = 'Top 10 Viral Videos'
     col1, col2 = st.columns(2)
     with col1:
         try:
-            df_hashtag = pd.read_csv(hashtag_csv)
+            df_hashtag = load_top_hashtags(video_horizon).copy()
             df_hashtag.index = df_hashtag.index + 1
             st.subheader(subtitle_hashtag)
             st.dataframe(df_hashtag)
         except Exception as e:
-            st.error(f'Could not read {hashtag_csv}: {e}')
+            st.error(f'Could not read the top {video_horizon} hashtags: {e}')
     with col2:
         try:
-            df_video = pd.read_csv(video_csv)
+            df_video = None
+            if SCORING_URL:
+                # Live scores only after an explicit refresh; reruns reuse the memoized result
+                refresh = st.session_state.get('live_scores_refresh', 0)
+                if st.button('Refresh live scores', key='live_scores_button'):
+                    refresh += 1
+                    st.session_state['live_scores_refresh'] = refresh
+                try:
+                    if refresh:
+                        df_video = with_video_columns(load_live_top_videos(video_horizon, refresh), TOP_VIDEO_COLUMNS)
+                except Exception as e:
+                    st.warning(f'Scoring service at {SCORING_URL} unavailable, showing stored scores: {e}')
+            if df_video is None:
+                df_video = load_top_videos(video_horizon, columns=TOP_VIDEO_COLUMNS).copy()
             df_video.index = df_video.index + 1
             columns_to_show = {}
             if 'id' in df_video.columns:
@@ -158,4 +178,4 @@ def show_trend_forecast():
                 st.subheader(subtitle_video)
                 st.dataframe(df_video.head(10))
         except Exception as e:
-            st.error(f'Could not read {video_csv}: {e}')
+            st.error(f'Could not read the {video_horizon} viral video scores: {e}')
@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+from data_cache import cached
+from snapshot_store import TREND_KEYS, csv_path, load_trend
+
+# Trend Store
+#
+# All trend series of a snapshot table packed CSR-style: series i owns the points
+# timestamps[offsets[i]:offsets[i + 1]] / values[offsets[i]:offsets[i + 1]], sorted
+# by time. Aggregates are computed with segment reductions, so no per-point Python
+# objects are created no matter how many entities are tracked.
+
+
+class TrendStore:
+    def __init__(self, keys, offsets, timestamps, values):
+        self.keys = np.asarray(keys)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float32)
+        self._index = pd.Index(self.keys)
+
+    @classmethod
+    def from_points(cls, keys, timestamps, values):
+        """Build a store from long-form (key, timestamp, value) arrays in any order"""
+        codes, uniques = pd.factorize(np.asarray(keys), sort=False)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        order = np.lexsort((timestamps, codes))
+        counts = np.bincount(codes, minlength=len(uniques))
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        return cls(uniques, offsets, timestamps[order], np.asarray(values, dtype=np.float32)[order])
+
+    @classmethod
+    def from_frame(cls, df, key, date='date', value='value'):
+        return cls.from_points(df[key].to_numpy(), df[date].to_numpy(), df[value].to_numpy())
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.timestamps.nbytes + self.values.nbytes + self.keys.nbytes
+
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def positions(self, keys):
+        return self._index.get_indexer(np.asarray(keys))
+
+    def series(self, key):
+        """Return (timestamps, values) views for one entity"""
+        i = self._index.get_loc(key)
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.timestamps[start:end], self.values[start:end]
+
+    def _reduce(self, ufunc, values=None):
+        values = self.values if values is None else values
+        lengths = self.lengths()
+        out = np.full(len(self), np.nan, dtype=np.float64)
+        nonempty = lengths > 0
+        if values.size:
+            reduced = ufunc.reduceat(values.astype(np.float64), self.offsets[:-1][nonempty])
+            out[nonempty] = reduced
+        return out
+
+    def sums(self):
+        return self._reduce(np.add)
+
+    def means(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.sums() / self.lengths()
+
+    def maxes(self):
+        return self._reduce(np.maximum)
+
+    def first_values(self):
+        lengths = self.lengths()
+        out = np.full(len(self), np.nan, dtype=np.float64)
+        out[lengths > 0] = self.values[self.offsets[:-1][lengths > 0]]
+        return out
+
+    def last_values(self):
+        lengths = self.lengths()
+        out = np.full(len(self), np.nan, dtype=np.float64)
+        out[lengths > 0] = self.values[self.offsets[1:][lengths > 0] - 1]
+        return out
+
+    def endpoint_slopes(self):
+        """(last - first) / (n - 1) per series, 0 for series with fewer than two points"""
+        lengths = self.lengths()
+        out = np.zeros(len(self), dtype=np.float64)
+        multi = lengths > 1
+        out[multi] = (self.last_values()[multi] - self.first_values()[multi]) / (lengths[multi] - 1)
+        return out
+
+    def regress(self, time_unit=1):
+        """Least-squares slope, intercept and r of every series in one vectorized pass
+
+        x is the time since each series' first point in units of time_unit seconds,
+        matching scipy.stats.linregress(dates - dates.min(), values) per series.
+        """
+        lengths = self.lengths()
+        n = lengths.astype(np.float64)
+        x = (self.timestamps - np.repeat(self.timestamps[self.offsets[:-1][lengths > 0]], lengths[lengths > 0])) / time_unit
+        y = self.values.astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_x = self._reduce(np.add, x) / n
+            mean_y = self._reduce(np.add, y) / n
+            dx = x - np.repeat(mean_x, lengths)
+            dy = y - np.repeat(mean_y, lengths)
+            sxx = self._reduce(np.add, dx * dx)
+            sxy = self._reduce(np.add, dx * dy)
+            syy = self._reduce(np.add, dy * dy)
+            slope = np.where((lengths > 1) & (sxx > 0), sxy / sxx, np.nan)
+            intercept = mean_y - slope * mean_x
+            r = np.where(syy > 0, sxy / np.sqrt(sxx * syy), 0.0)
+        r = np.where(np.isnan(slope), np.nan, np.clip(r, -1.0, 1.0))
+        return pd.DataFrame({'slope': slope, 'intercept': intercept, 'r': r}, index=self.keys)
+
+    def fastest_growing(self, n, time_unit=1):
+        """The n series with the steepest regression slope, steepest first"""
+        fits = self.regress(time_unit).dropna(subset=['slope'])
+        return fits.nlargest(n, 'slope')
+
+    def aggregate(self, how='mean'):
+        """Per-entity aggregate as a Series indexed by key"""
+        reducers = {'mean': self.means, 'max': self.maxes, 'sum': self.sums, 'slope': self.endpoint_slopes}
+        return pd.Series(reducers[how](), index=self.keys)
+
+    def top_n(self, n, by='mean'):
+        """Keys of the n entities with the highest aggregate, best first"""
+        scores = self.aggregate(by).to_numpy()
+        scores = np.where(np.isnan(scores), -np.inf, scores)
+        n = min(n, len(scores))
+        if n == 0:
+            return self.keys[:0]
+        top = np.argpartition(-scores, n - 1)[:n]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return self.keys[top]
+
+    def to_frame(self, keys=None, key_name='key'):
+        """Long DataFrame (key, date, value) for the requested entities only, e.g. for charting"""
+        if keys is None:
+            positions = np.arange(len(self))
+        else:
+            positions = self.positions(keys)
+            positions = positions[positions >= 0]
+        starts = self.offsets[positions]
+        lengths = self.offsets[positions + 1] - starts
+        # Gather the point indices of every selected series without a Python loop
+        point_idx = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return pd.DataFrame({
+            key_name: np.repeat(self.keys[positions], lengths),
+            'date': pd.to_datetime(self.timestamps[point_idx], unit='s'),
+            'value': self.values[point_idx],
+        })
+
+    def to_matrix(self, period=86400):
+        """Dense (entities x periods) float matrix on a shared time grid starting at the earliest point
+
+        Returns (matrix, period start timestamps); periods without a point are NaN.
+        """
+        if not len(self.timestamps):
+            return np.full((len(self), 0), np.nan), np.array([], dtype=np.int64)
+        start = self.timestamps.min()
+        columns = (self.timestamps - start) // period
+        matrix = np.full((len(self), int(columns.max()) + 1), np.nan, dtype=np.float64)
+        matrix[np.repeat(np.arange(len(self)), self.lengths()), columns] = self.values
+        return matrix, start + period * np.arange(matrix.shape[1], dtype=np.int64)
+
+    def regroup(self, groups, how='mean'):
+        """Combine entity series into one series per group (e.g. industry), aligned on timestamp"""
+        point_groups = np.repeat(np.asarray(groups), self.lengths())
+        combined = (
+            pd.DataFrame({'group': point_groups, 'date': self.timestamps, 'value': self.values})
+            .groupby(['group', 'date'], sort=False)['value']
+            .agg(how)
+            .reset_index()
+        )
+        return TrendStore.from_frame(combined, 'group')
+
+
+@cached(csv_path)
+def load_trend_store(name):
+    """Build the trend store for a snapshot table (trending_hashtags, trending_songs)"""
+    return TrendStore.from_frame(load_trend(name), TREND_KEYS[name])
@@ -1,26 +1,34 @@
 import streamlit as st
-import pandas as pd
-import ast
+from data_cache import cached
+from leaderboards import load_leaderboard
+from plot_utils import scalable_scatter
+from partition_store import current_scope, load_scoped, partition_paths
+from snapshot_store import csv_path
+from wordcloud_cache import render_wordcloud, term_frequencies
+
+CHALLENGE_COLUMNS = ['name', 'desc', 'userCount', 'viewCount']
+
+@cached(csv_path('trending_challenges'), lambda: partition_paths('trending_challenges'), context=current_scope)
+def challenge_wordcloud():
+    frequencies = term_frequencies(load_scoped('trending_challenges', columns=['desc'])['desc'])
+    return render_wordcloud(frequencies, width=600, height=200, background_color='white', colormap='coolwarm')
+
+def prefetch():
+    challenge_wordcloud()
+    for metric in ('userCount', 'viewCount'):
+        load_leaderboard('trending_challenges', metric)
 
 def show_trending_challenges():
     st.markdown('<h2 style="margin-bottom: 0.5em;">Trending Challenges</h2>', unsafe_allow_html=True)
     try:
-        df = pd.read_csv('back up tiktok/trending_challenges.csv')
+        df = load_scoped('trending_challenges', columns=CHALLENGE_COLUMNS)
          # --- Word Cloud for Common Words in Challenge Descriptions ---
         if 'desc' in df.columns and not df['desc'].dropna().empty:
-            from wordcloud import WordCloud
-            import matplotlib.pyplot as plt
-            text = " ".join(df["desc"].dropna())
-            wordcloud = WordCloud(width=600, height=200, background_color='white', colormap='coolwarm').generate(text)
             st.markdown('**Common Words in Challenge Descriptions**')
-            fig_wc, ax = plt.subplots(figsize=(3,1))
-            ax.imshow(wordcloud, interpolation='bilinear')
-            ax.axis("off")
-            st.pyplot(fig_wc)
+            st.image(challenge_wordcloud(), use_container_width=True)
         # --- User Count vs View Count Scatterplot (Plotly) ---
         if 'userCount' in df.columns and 'viewCount' in df.columns:
-            import plotly.express as px
-            fig_scatter = px.scatter(
+            fig_scatter = scalable_scatter(
                 df,
                 x="userCount",
                 y="viewCount",
@@ -37,15 +45,15 @@ def show_trending_challenges():
             with col1:
                 st.markdown('**Top 10 Challenges by User Count**')
                 import plotly.express as px
-                top10_user = df.sort_values("userCount", ascending=False).head(10)
+                top10_user = load_leaderboard('trending_challenges', 'userCount')
                 fig_user = px.bar(
                     top10_user,
                     x="userCount",
-                    y="challenge_name" if 'challenge_name' in df.columns else 'name',
+                    y="name",
                     orientation='h',
                     color="userCount",
                     color_continuous_scale="Blues",
-                    labels={"userCount": "User Count", "challenge_name": "Challenge", "name": "Challenge"},
+                    labels={"userCount": "User Count", "name": "Challenge"},
                     title="Top 10 Trending Challenges by User Count"
                 )
                 fig_user.update_layout(yaxis={'categoryorder':'total ascending'}, plot_bgcolor='white', paper_bgcolor='white', font_color='#232526')
@@ -54,7 +62,7 @@ def show_trending_challenges():
             with col2:
                 st.markdown('**Top 10 Challenges by Views**')
                 import plotly.express as px
-                top10_views = df.sort_values("viewCount", ascending=False).head(10)
+                top10_views = load_leaderboard('trending_challenges', 'viewCount')
                 fig_views = px.bar(
                     top10_views,
                     x="viewCount",
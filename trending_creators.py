@@ -1,27 +1,35 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+from leaderboards import load_leaderboard
+from plot_utils import scalable_scatter, update_markers
+from partition_store import load_scoped
+
+CREATOR_COLUMNS = ['nick_name', 'follower_cnt', 'liked_cnt']
+
+def prefetch():
+    load_scoped('trending_creators', columns=CREATOR_COLUMNS)
+    for metric in ('follower_cnt', 'liked_cnt'):
+        load_leaderboard('trending_creators', metric)
 
 def show_trending_creators():
     st.markdown('<h2 style="margin-bottom: 0.5em;">Trending Creators</h2>', unsafe_allow_html=True)
     try:
-        creators_df = pd.read_csv('back up tiktok/trending_creators.csv')
+        creators_df = load_scoped('trending_creators', columns=CREATOR_COLUMNS)
         if 'nick_name' in creators_df.columns and 'follower_cnt' in creators_df.columns and 'liked_cnt' in creators_df.columns:
             # Top 10 by Followers and Likes (side by side)
             col1, col2 = st.columns(2)
             with col1:
                 st.markdown('**Top 10 Most Followed Creators**')
-                top_followed = creators_df.sort_values('follower_cnt', ascending=False).head(10)
-                st.dataframe(top_followed[['nick_name', 'follower_cnt']].reset_index(drop=True))
+                top_followed = load_leaderboard('trending_creators', 'follower_cnt')
+                st.dataframe(top_followed)
             
             with col2:
                 st.markdown('**Top 10 Most Liked Creators**')
-                top_liked = creators_df.sort_values('liked_cnt', ascending=False).head(10)
-                st.dataframe(top_liked[['nick_name', 'liked_cnt']].reset_index(drop=True))
+                top_liked = load_leaderboard('trending_creators', 'liked_cnt')
+                st.dataframe(top_liked)
 
             # Followers vs Likes scatter plot
             st.markdown('### Followers vs Likes Analysis')
-            fig_scatter = px.scatter(
+            fig_scatter = scalable_scatter(
                 creators_df,
                 x='follower_cnt',
                 y='liked_cnt',
@@ -31,7 +39,7 @@ def show_trending_creators():
                 color_continuous_scale='rdbu',
                 hover_data=['nick_name']
             )
-            fig_scatter.update_traces(marker=dict(size=10, opacity=0.7))
+            update_markers(fig_scatter, marker=dict(size=10, opacity=0.7))
             fig_scatter.update_layout(
                 plot_bgcolor='rgba(0,0,0,0)',
                 paper_bgcolor='rgba(0,0,0,0)',
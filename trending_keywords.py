@@ -1,26 +1,38 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
+from data_cache import cached
+from leaderboards import load_leaderboard
+from plot_utils import scalable_scatter, update_markers
+from partition_store import current_scope, load_scoped, partition_paths
+from snapshot_store import csv_path
+from wordcloud_cache import render_wordcloud, term_frequencies
+
+KEYWORD_COLUMNS = ['keyword', 'like', 'comment', 'share', 'cost', 'ctr', 'post_change']
+
+@cached(csv_path('trending_keywords'), lambda: partition_paths('trending_keywords'), context=current_scope)
+def keyword_wordcloud():
+    frequencies = term_frequencies(load_scoped('trending_keywords', columns=['keyword'])['keyword'])
+    return render_wordcloud(frequencies, background_color='white', width=600, height=200, colormap='Purples')
+
+def prefetch():
+    keyword_wordcloud()
+    for metric in ('ctr', 'engagement', 'cvr', 'play_six_rate', 'post_change'):
+        load_leaderboard('trending_keywords', metric)
 
 def show_trending_keywords():
+    import plotly.express as px
     st.markdown('<h2 style="margin-bottom: 0.5em;">Trending Keywords</h2>', unsafe_allow_html=True)
     try:
-        trending_keywords_df = pd.read_csv('back up tiktok/trending_keywords.csv')
+        trending_keywords_df = load_scoped('trending_keywords', columns=KEYWORD_COLUMNS)
+        # Synthetic engagement score (assigned on a copy; loaded frames are shared)
+        trending_keywords_df = trending_keywords_df.assign(
+            engagement=trending_keywords_df['like'] + trending_keywords_df['comment'] + trending_keywords_df['share']
+        )
         # Word Cloud for keyword prominence
         st.markdown('**Keyword Prominence (Word Cloud)**')
-        text = " ".join(trending_keywords_df['keyword'].astype(str).tolist())
-        wordcloud = WordCloud(background_color='white', width=600, height=200, colormap='Purples').generate(text)
-        fig_wc, ax_wc = plt.subplots(figsize=(3, 1))
-        ax_wc.imshow(wordcloud, interpolation='bilinear')
-        ax_wc.axis("off")
-        st.pyplot(fig_wc)
+        st.image(keyword_wordcloud(), use_container_width=True)
         # Top 10 by CTR
-        top_ctr = trending_keywords_df.sort_values(by='ctr', ascending=False).head(10)
-        # Synthetic engagement score
-        trending_keywords_df['engagement'] = trending_keywords_df['like'] + trending_keywords_df['comment'] + trending_keywords_df['share']
-        top_engagement = trending_keywords_df.sort_values('engagement', ascending=False).head(10)
+        top_ctr = load_leaderboard('trending_keywords', 'ctr')
+        top_engagement = load_leaderboard('trending_keywords', 'engagement')
         # Display CTR and Engagement charts side by side
         chart_col1, chart_col2 = st.columns(2)
         with chart_col1:
@@ -68,18 +80,18 @@ def show_trending_keywords():
             )
             st.plotly_chart(fig_eng, use_container_width=True)
         # Top 10 by CVR, Play Six Rate, and Post-Change Impact (side by side)
-        top_cvr = trending_keywords_df.sort_values(by='cvr', ascending=False).head(10)
-        top_play_six = trending_keywords_df.sort_values(by='play_six_rate', ascending=False).head(10)
+        top_cvr = load_leaderboard('trending_keywords', 'cvr')
+        top_play_six = load_leaderboard('trending_keywords', 'play_six_rate')
         post_impact = None
         if 'post_change' in trending_keywords_df.columns:
-            post_impact = trending_keywords_df.sort_values('post_change', ascending=False)[['keyword', 'post_change']].head(10).reset_index(drop=True)
+            post_impact = load_leaderboard('trending_keywords', 'post_change')
         col1, col2, col3 = st.columns(3)
         with col1:
             st.markdown('**Top 10 by CVR**')
-            st.dataframe(top_cvr[['keyword', 'cvr']].reset_index(drop=True))
+            st.dataframe(top_cvr)
         with col2:
             st.markdown('**Top 10 by Play Six Rate**')
-            st.dataframe(top_play_six[['keyword', 'play_six_rate']].reset_index(drop=True))
+            st.dataframe(top_play_six)
         with col3:
             if post_impact is not None:
                 st.markdown('**Top 10 by Post-Change Impact**')
@@ -87,7 +99,7 @@ def show_trending_keywords():
         # Cost vs Performance Bubble Chart
         if 'cost' in trending_keywords_df.columns:
             st.markdown('**Cost vs CTR by Keyword (Bubble Chart)**')
-            fig_bubble = px.scatter(
+            fig_bubble = scalable_scatter(
                 trending_keywords_df,
                 x='cost',
                 y='ctr',
@@ -98,7 +110,7 @@ def show_trending_keywords():
                 labels={'cost': 'Cost', 'ctr': 'Click-Through Rate (CTR)', 'engagement': 'Engagement'},
                 title='Cost vs CTR by Keyword (Bubble size = Engagement)'
             )
-            fig_bubble.update_traces(marker=dict(opacity=0.7, line=dict(width=1, color='DarkSlateGrey')), textposition='top center')
+            update_markers(fig_bubble, marker=dict(opacity=0.7, line=dict(width=1, color='DarkSlateGrey')), textposition='top center')
             fig_bubble.update_layout(
                 plot_bgcolor='white',
                 paper_bgcolor='white',
@@ -1,39 +1,33 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import ast
-from scipy.stats import linregress
+from partition_store import load_scoped, load_scoped_trend_store
+
+SONG_COLUMNS = ['songID', 'title', 'duration']
+
+def prefetch():
+    load_scoped('trending_songs', columns=SONG_COLUMNS)
+    load_scoped_trend_store('trending_songs')
 
 def show_trending_songs():
+    import plotly.express as px
+    import plotly.graph_objects as go
     st.markdown('<h2 style="margin-bottom: 0.5em;">Trending Songs</h2>', unsafe_allow_html=True)
     song_col1, song_col2 = st.columns(2)
     try:
-        trending_songs_df = pd.read_csv('back up tiktok/trending_songs.csv')
-        trending_songs_df['trend'] = trending_songs_df['trend'].apply(lambda x: ast.literal_eval(x) if isinstance(x, str) else x)
-        # Expand trend list into new DataFrame
-        trend_rows = []
-        for idx, row in trending_songs_df.iterrows():
-            for trend_point in row['trend']:
-                trend_rows.append({
-                    'title': row['title'],
-                    'author': row['author'],
-                    'date': pd.to_datetime(trend_point['date'], unit='s'),
-                    'value': trend_point['value']
-                })
-        trend_df = pd.DataFrame(trend_rows)
-        # Get top 5 songs by max trend value
-        top_titles = trend_df.groupby('title')['value'].max().sort_values(ascending=False).head(5).index
-        top_df = trend_df[trend_df['title'].isin(top_titles)]
+        trending_songs_df = load_scoped('trending_songs', columns=SONG_COLUMNS)
+        song_trends = load_scoped_trend_store('trending_songs')
+        song_titles = trending_songs_df.set_index('songID')['title']
+        # Get top 5 songs by max trend value and expand only their points
+        top_songs = song_trends.top_n(5, by='max')
+        top_df = song_trends.to_frame(top_songs, key_name='songID')
         with song_col1:
             fig = go.Figure()
-            for title in top_titles:
-                song_data = top_df[top_df['title'] == title]
+            for song_id in top_songs:
+                song_data = top_df[top_df['songID'] == song_id]
                 fig.add_trace(go.Scatter(
                     x=song_data['date'],
                     y=song_data['value'],
                     mode='lines+markers',
-                    name=title
+                    name=song_titles.get(song_id, song_id)
                 ))
             fig.update_layout(
                 title='Top 5 Songs: Trend Value Over Time',
@@ -50,16 +44,9 @@ def show_trending_songs():
                 margin=dict(l=60, r=30, t=60, b=40)
             )
             st.plotly_chart(fig, use_container_width=True)
-        # Calculate growth rate (slope) for each song
-        growth_data = []
-        for title in trending_songs_df['title'].unique():
-            subset = trend_df[trend_df['title'] == title].sort_values('date')
-            if len(subset) >= 2:
-                x = (subset['date'] - subset['date'].min()).dt.total_seconds()
-                y = subset['value']
-                slope, _, _, _, _ = linregress(x, y)
-                growth_data.append({'title': title, 'slope': slope})
-        growth_df = pd.DataFrame(growth_data).sort_values('slope', ascending=False)
+        # Calculate growth rate (slope) for every song in one batched regression
+        growth_df = song_trends.fastest_growing(5)
+        growth_df['title'] = song_titles.reindex(growth_df.index).to_numpy()
         with song_col2:
             fig2 = px.bar(
                 growth_df.head(5),
@@ -83,18 +70,9 @@ def show_trending_songs():
             )
             st.plotly_chart(fig2, use_container_width=True)
         # Song Duration vs Average Trend Score (no extra h2, just chart below)
-        trend_rows_duration = []
-        for _, row in trending_songs_df.iterrows():
-            if isinstance(row['trend'], list):
-                for t in row['trend']:
-                    trend_rows_duration.append({
-                        'title': row['title'],
-                        'duration': row['duration'],
-                        'date': pd.to_datetime(t['date'], unit='s'),
-                        'value': t['value']
-                    })
-        trend_df_duration = pd.DataFrame(trend_rows_duration)
-        avg_trend = trend_df_duration.groupby(['title', 'duration'])['value'].mean().reset_index()
+        avg_trend = trending_songs_df[['songID', 'title', 'duration']].assign(
+            value=song_trends.aggregate('mean').reindex(trending_songs_df['songID']).to_numpy()
+        ).dropna(subset=['value'])
         fig3 = px.scatter(
             avg_trend,
             x='duration',
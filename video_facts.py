@@ -0,0 +1,263 @@
+import os
+import threading
+import pandas as pd
+from data_cache import cached
+from schema_registry import apply_schema, table_schema
+from snapshot_store import SNAPSHOT_DIR, csv_path, read_snapshot, schema_is_current, write_columnar
+
+# Video Facts
+#
+# The video exports (trending_videos, enhanced_trend_predictions,
+# full_df_with_entities / _sentiment_topics, predicted_viral_videos*) repeat the
+# same base columns, captions and URLs included, for the same ids. They are
+# normalized into one fact table keyed by id plus narrow side tables holding
+# only what each stage added: engineered features, NLP outputs and the
+# predictions per horizon. Every column is stored once; a membership table
+# records which ids each export listed. load_videos reads only the tables
+# holding the requested columns and joins them on id; given a view it returns
+# exactly the rows of one of the original exports. Derived stages write just
+# their new columns keyed by id and use with_video_columns for display columns.
+#
+#   python video_facts.py
+
+FACT_DIR = os.path.join(SNAPSHOT_DIR, 'facts')
+KEY = 'id'
+# Fact / side table -> exports its columns are taken from; an earlier export
+# wins, later ones only fill ids and values it lacks
+FACT_SOURCES = {
+    'video_facts': [
+        'enhanced_trend_predictions', 'full_df_with_entities', 'full_df_with_sentiment_topics', 'predicted_viral_videos',
+        'predicted_viral_videos_next_24h', 'predicted_viral_videos_next_7d', 'trending_videos',
+    ],
+    'video_features': [
+        'enhanced_trend_predictions', 'full_df_with_entities', 'full_df_with_sentiment_topics', 'predicted_viral_videos',
+        'predicted_viral_videos_next_24h', 'predicted_viral_videos_next_7d',
+    ],
+    'video_nlp': ['full_df_with_entities', 'full_df_with_sentiment_topics'],
+    'video_predictions': ['predicted_viral_videos'],
+    'video_predictions_24h': ['predicted_viral_videos_next_24h'],
+    'video_predictions_7d': ['predicted_viral_videos_next_7d'],
+}
+# Original export -> tables its columns are joined from; its rows are the ids
+# the membership table records for it
+VIEWS = {
+    'trending_videos': ['video_facts'],
+    'enhanced_trend_predictions': ['video_facts', 'video_features'],
+    'full_df_with_entities': ['video_facts', 'video_features', 'video_nlp'],
+    'full_df_with_sentiment_topics': ['video_facts', 'video_features', 'video_nlp'],
+    'predicted_viral_videos': ['video_facts', 'video_features', 'video_predictions'],
+    'predicted_viral_videos_next_24h': ['video_facts', 'video_features', 'video_predictions_24h'],
+    'predicted_viral_videos_next_7d': ['video_facts', 'video_features', 'video_predictions_7d'],
+}
+# (export, id) of every row of every export, in export order
+MEMBERSHIP_TABLE = 'video_exports'
+
+# Serializes building between the render thread and background prefetch
+_build_lock = threading.Lock()
+
+
+def fact_path(table):
+    return os.path.join(FACT_DIR, f'{table}.parquet')
+
+
+def table_columns(table):
+    """id followed by the columns a fact / side table holds"""
+    return [KEY] + [column for column in table_schema(table) if column != KEY]
+
+
+def source_paths():
+    """CSV paths of every video export the tables are built from"""
+    return [csv_path(name) for name in dict.fromkeys(n for names in FACT_SOURCES.values() for n in names)]
+
+
+def _coalesce(table):
+    columns = table_columns(table)
+    parts = []
+    for name in FACT_SOURCES[table]:
+        if not os.path.exists(csv_path(name)):
+            continue
+        part = read_snapshot(name, columns)
+        if KEY in part.columns and len(part.columns) > 1:
+            parts.append(part.drop_duplicates(KEY).set_index(KEY))
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    # Ids in the order the exports list them
+    ids = pd.Index(pd.concat([part.index.to_series() for part in parts]).drop_duplicates(), name=KEY)
+    df = pd.DataFrame(index=ids)
+    for part in parts:
+        for column in part.columns:
+            values = part[column]
+            if not part.index.equals(ids):
+                # Nullable integers, so 64-bit ids and counts survive the missing rows exactly
+                values = (values.astype('Int64') if pd.api.types.is_integer_dtype(values) else values).reindex(ids)
+            if column not in df.columns:
+                df[column] = values
+            elif df[column].isna().any():
+                df[column] = df[column].fillna(values)
+    for column in df.columns:
+        if df[column].dtype == 'Int64' and df[column].notna().all():
+            df[column] = df[column].astype('int64')
+    df = df.reset_index()
+    return df[[column for column in columns if column in df.columns]]
+
+
+def _membership():
+    frames = []
+    for name in VIEWS:
+        if not os.path.exists(csv_path(name)):
+            continue
+        ids = read_snapshot(name, [KEY])
+        if KEY in ids.columns:
+            frames.append(pd.DataFrame({'export': name, KEY: ids[KEY].drop_duplicates().to_numpy()}))
+    if not frames:
+        return pd.DataFrame(columns=['export', KEY])
+    return pd.concat(frames, ignore_index=True)
+
+
+def build_video_facts():
+    """Normalize the video exports into the fact, side and membership tables; returns {table: rows}"""
+    os.makedirs(FACT_DIR, exist_ok=True)
+    rows = {}
+    for table in [*FACT_SOURCES, MEMBERSHIP_TABLE]:
+        df = _membership() if table == MEMBERSHIP_TABLE else _coalesce(table)
+        apply_schema(table, df)
+        write_columnar(table, df, fact_path(table))
+        rows[table] = len(df)
+    return rows
+
+
+def _is_stale():
+    newest = max((os.path.getmtime(path) for path in source_paths() if os.path.exists(path)), default=0)
+    for table in [*FACT_SOURCES, MEMBERSHIP_TABLE]:
+        path = fact_path(table)
+        if not os.path.exists(path) or os.path.getmtime(path) < newest or not schema_is_current(table, path):
+            return True
+    return False
+
+
+def _ensure_built():
+    with _build_lock:
+        if _is_stale():
+            build_video_facts()
+
+
+def _read_fact_table(table, columns):
+    import pyarrow.parquet as pq
+    available = pq.read_schema(fact_path(table)).names
+    return pd.read_parquet(fact_path(table), columns=[c for c in dict.fromkeys([KEY, *columns]) if c in available])
+
+
+def _plan(columns, tables):
+    # Requested columns grouped by the table holding them; unknown columns are skipped
+    plan = {}
+    for column in columns:
+        for table in tables:
+            if column in table_columns(table)[1:]:
+                plan.setdefault(table, []).append(column)
+                break
+    return plan
+
+
+@cached(lambda columns=None, view=None: source_paths())
+def load_videos(columns=None, view=None):
+    """Videos with the requested columns (all, if None), joined on id from the tables that hold them
+
+    view names an original export whose rows (and columns) are returned; without
+    one every known video is returned. Requested columns no table holds are
+    skipped, as in snapshot_store.load_table.
+    """
+    _ensure_built()
+    tables = VIEWS[view] if view is not None else list(FACT_SOURCES)
+    if columns is None:
+        columns = [column for table in tables for column in table_columns(table)[1:]]
+    plan = _plan(columns, tables)
+    if view is None:
+        df = _read_fact_table('video_facts', plan.pop('video_facts', []))
+    else:
+        df = pd.read_parquet(fact_path(MEMBERSHIP_TABLE), columns=[KEY], filters=[('export', '==', view)])
+    for table, wanted in plan.items():
+        df = df.merge(_read_fact_table(table, wanted), on=KEY, how='left')
+    return df[[column for column in dict.fromkeys([KEY, *columns]) if column in df.columns]]
+
+
+def _join_side_tables(df, plan):
+    # Only the frame's ids are read from each side table
+    import pyarrow.dataset as ds
+    for table, wanted in plan.items():
+        side = ds.dataset(fact_path(table)).to_table(
+            columns=[KEY] + wanted, filter=ds.field(KEY).isin(df[KEY].tolist())
+        ).to_pandas()
+        df = df.merge(side, on=KEY, how='left')
+    return df
+
+
+def load_video_rows(ids, columns, view=None):
+    """load_videos(columns, view) restricted to the given ids, with the id filter pushed into every scan"""
+    import pyarrow.dataset as ds
+    _ensure_built()
+    tables = VIEWS[view] if view is not None else list(FACT_SOURCES)
+    plan = _plan(columns, tables)
+    wanted = ds.field(KEY).isin(list(ids))
+    if view is None:
+        own = [KEY] + plan.pop('video_facts', [])
+        df = ds.dataset(fact_path('video_facts')).to_table(columns=own, filter=wanted).to_pandas()
+    else:
+        df = ds.dataset(fact_path(MEMBERSHIP_TABLE)).to_table(
+            columns=[KEY], filter=(ds.field('export') == view) & wanted
+        ).to_pandas()
+    df = _join_side_tables(df, plan)
+    return df[[column for column in dict.fromkeys([KEY, *columns]) if column in df.columns]]
+
+
+def load_video_ids(view, column, value):
+    """Ids of a view's rows whose column equals value, with the condition pushed into the scan"""
+    import pyarrow.dataset as ds
+    _ensure_built()
+    table = next(iter(_plan([column], VIEWS[view])))
+    ids = ds.dataset(fact_path(table)).to_table(columns=[KEY], filter=ds.field(column) == value)[KEY]
+    if FACT_SOURCES[table] != [view]:
+        # The table also holds rows of other exports
+        ids = ds.dataset(fact_path(MEMBERSHIP_TABLE)).to_table(
+            columns=[KEY], filter=(ds.field('export') == view) & ds.field(KEY).isin(ids)
+        )[KEY]
+    return ids.to_numpy()
+
+
+def iter_video_batches(columns, view=None, batch_size=10000):
+    """Stream load_videos(columns, view) as DataFrames of at most batch_size rows"""
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    _ensure_built()
+    tables = VIEWS[view] if view is not None else list(FACT_SOURCES)
+    plan = _plan(columns, tables)
+    if view is None:
+        own = [KEY] + plan.pop('video_facts', [])
+        batches = pq.ParquetFile(fact_path('video_facts')).iter_batches(batch_size=batch_size, columns=own)
+    else:
+        batches = ds.dataset(fact_path(MEMBERSHIP_TABLE)).to_batches(
+            columns=[KEY], filter=ds.field('export') == view, batch_size=batch_size
+        )
+    for batch in batches:
+        if not batch.num_rows:
+            continue
+        df = _join_side_tables(batch.to_pandas(), plan)
+        yield df[[column for column in dict.fromkeys([KEY, *columns]) if column in df.columns]]
+
+
+def with_video_columns(df, columns):
+    """A frame keyed by id with the listed video columns it lacks joined in from the fact tables"""
+    missing = [column for column in columns if column != KEY and column not in df.columns]
+    if not missing:
+        return df
+    # Only the frame's ids are read
+    videos = load_video_rows(df[KEY].drop_duplicates().tolist(), [KEY, *missing])
+    merged = df.merge(videos, on=KEY, how='left')
+    return merged[[column for column in dict.fromkeys([*columns, *df.columns]) if column in merged.columns]]
+
+
+if __name__ == '__main__':
+    exports = sum(os.path.getsize(path) for path in source_paths() if os.path.exists(path))
+    for table, count in build_video_facts().items():
+        print(f'{table}: {count} rows, {os.path.getsize(fact_path(table)) / 2 ** 10:.0f} KiB')
+    total = sum(os.path.getsize(fact_path(table)) for table in [*FACT_SOURCES, MEMBERSHIP_TABLE])
+    print(f'{total / 2 ** 10:.0f} KiB for {exports / 2 ** 10:.0f} KiB of video exports')
@@ -0,0 +1,105 @@
+import glob
+import hashlib
+import io
+import json
+import os
+import pandas as pd
+from data_cache import cache
+from snapshot_store import SNAPSHOT_DIR
+
+# Word Cloud Cache
+#
+# Word clouds are built in two steps: term frequencies are counted with
+# vectorized string ops and capped to the top N terms, then the layout is
+# rendered from those frequencies. The rendered PNG is stored in memory (shared
+# data cache) and on disk under a hash of the frequency table and the style, so
+# unchanged data never reruns the layout, even across restarts. The disk cache
+# is bounded: reading a PNG marks it as used, and the least recently used PNGs
+# are deleted once the folder exceeds its budget.
+#
+# TIKTOK_WORDCLOUD_MB      disk budget in megabytes (default 64)
+
+WORDCLOUD_DIR = os.path.join(SNAPSHOT_DIR, 'wordclouds')
+DISK_MB = float(os.environ.get('TIKTOK_WORDCLOUD_MB', 64))
+MAX_TERMS = 200
+# Same tokenization as WordCloud.process_text
+TOKEN_PATTERN = r"\w[\w']*"
+
+
+def term_frequencies(texts, max_terms=MAX_TERMS):
+    """Top max_terms lowercase word counts over a Series of texts, stopwords removed"""
+    from wordcloud import STOPWORDS
+    tokens = texts.dropna().astype(str).str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+    tokens = tokens.str.replace(r"'s$", '', regex=True)
+    # Single characters and bare numbers are noise in a cloud
+    tokens = tokens[(tokens.str.len() > 1) & ~tokens.str.isdigit() & ~tokens.isin(STOPWORDS)]
+    return tokens.value_counts().head(max_terms)
+
+
+def fingerprint(frequencies, style):
+    payload = json.dumps([list(zip(frequencies.index, frequencies.tolist())), sorted(style.items())], default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _render_png(frequencies, style):
+    from wordcloud import WordCloud
+    # Fixed random_state so a fingerprint always maps to the same image
+    wordcloud = WordCloud(random_state=0, **style).generate_from_frequencies(frequencies.to_dict())
+    buffer = io.BytesIO()
+    wordcloud.to_image().save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def prune_disk_cache(max_bytes=None, keep=()):
+    """Delete the least recently used PNGs until the folder fits max_bytes; returns the number deleted"""
+    max_bytes = int(DISK_MB * 2 ** 20) if max_bytes is None else max_bytes
+    entries = []
+    for path in glob.glob(os.path.join(WORDCLOUD_DIR, '*.png')):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    deleted = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        deleted += 1
+    return deleted
+
+
+def _load_or_render(frequencies, style, key):
+    path = os.path.join(WORDCLOUD_DIR, f'{key}.png')
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            png = f.read()
+        try:
+            # The modification time is the recency prune_disk_cache evicts by
+            os.utime(path)
+        except OSError:
+            pass
+        return png
+    png = _render_png(frequencies, style)
+    os.makedirs(WORDCLOUD_DIR, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(png)
+    os.replace(tmp_path, path)
+    prune_disk_cache(keep=(path,))
+    return png
+
+
+def render_wordcloud(frequencies, **style):
+    """PNG bytes of a word cloud for a term -> count Series, cached by content and style"""
+    if isinstance(frequencies, dict):
+        frequencies = pd.Series(frequencies)
+    key = fingerprint(frequencies, style)
+    return cache.get_or_compute((f'{__name__}.render_wordcloud', key, ()), lambda: _load_or_render(frequencies, style, key))